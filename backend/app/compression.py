@@ -0,0 +1,213 @@
+"""Response compression: on the fly for API bodies, ahead of time for the SPA.
+
+``CompressionMiddleware`` negotiates brotli or gzip for single-chunk
+responses (every JSON body the API sends) above a size threshold.
+Streaming responses (SSE, file downloads) pass through untouched.
+Compressed bodies are remembered per body object, so requests served from
+one single-flight buffer also share one compression.
+
+A compressed body is a different representation, so a strong ETag gets the
+coding appended (``"v5"`` -> ``"v5-br"``); ``base_etag`` strips it again
+when comparing validators a client sends back.
+
+Static files are compressed once at build time::
+
+    python -m app.compression static/
+
+writes ``name.br`` / ``name.gz`` next to every compressible file, and
+``PrecompressedStaticFiles`` serves those variants directly.
+"""
+
+from __future__ import annotations
+
+import gzip
+import mimetypes
+import os
+import sys
+from pathlib import Path
+
+import brotli
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .identity_cache import IdentityCache
+
+MIN_SIZE = int(os.environ.get("GRIDPERMIT_COMPRESS_MIN_SIZE", "1024"))
+# Fast settings for per-request work; build-time compression uses the maximum.
+_DYNAMIC_LEVEL = {"br": 4, "gzip": 6}
+_STATIC_LEVEL = {"br": 11, "gzip": 9}
+_SUFFIX = {"br": ".br", "gzip": ".gz"}
+
+COMPRESSIBLE_TYPES = (
+    "application/json", "application/javascript", "text/", "image/svg+xml",
+)
+COMPRESSIBLE_SUFFIXES = {".js", ".css", ".html", ".json", ".svg", ".txt", ".map", ".webmanifest"}
+
+# Vite puts only content-hashed files under /assets.
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def negotiate(accept_encoding: str) -> str | None:
+    """Pick "br" or "gzip" from an Accept-Encoding header (q=0 excludes)."""
+    offered: dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        offered[coding.strip()] = q
+    best = None
+    for coding in ("br", "gzip"):
+        q = offered.get(coding, offered.get("*", 0.0))
+        if q > 0 and (best is None or q > offered.get(best, offered.get("*", 0.0))):
+            best = coding
+    return best
+
+
+def coded_etag(etag: str, coding: str) -> str:
+    """The ETag of the ``coding`` representation; weak ETags stay as they are."""
+    if etag.startswith("W/") or not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{coding}"'
+
+
+def base_etag(etag: str) -> str:
+    """``etag`` without a coding added by ``coded_etag``."""
+    for coding in _SUFFIX:
+        suffix = f'-{coding}"'
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)] + '"'
+    return etag
+
+
+def compress(data: bytes, coding: str, level: int | None = None) -> bytes:
+    if coding == "br":
+        return brotli.compress(data, quality=level if level is not None else _DYNAMIC_LEVEL["br"])
+    return gzip.compress(data, compresslevel=level if level is not None else _DYNAMIC_LEVEL["gzip"])
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = MIN_SIZE, cache_size: int = 64) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        # (id(body), coding) -> compressed body
+        self._cache: IdentityCache[bytes] = IdentityCache(cache_size)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_headers = Headers(scope=scope)
+        coding = negotiate(request_headers.get("accept-encoding", ""))
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Message | None = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message  # held back until we know the body
+                return
+            if start is None:  # already decided; pass the rest through
+                await send(message)
+                return
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start["headers"])
+            etag = headers.get("etag")
+            if start["status"] == 304 and etag:
+                # Confirm the representation the client holds, compressed or not.
+                coded = coded_etag(etag, coding)
+                if coded in request_headers.get("if-none-match", ""):
+                    headers["ETag"] = coded
+            elif (
+                not message.get("more_body", False)
+                and len(body) >= self.minimum_size
+                and "content-encoding" not in headers
+                and headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+            ):
+                body = self._compressed(body, coding)
+                headers["Content-Encoding"] = coding
+                headers["Content-Length"] = str(len(body))
+                headers.add_vary_header("Accept-Encoding")
+                if etag:
+                    headers["ETag"] = coded_etag(etag, coding)
+                message = {**message, "body": body}
+            await send(start)
+            start = None
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+    def _compressed(self, body: bytes, coding: str) -> bytes:
+        key = (id(body), coding)
+        compressed = self._cache.get(key, body)
+        if compressed is None:
+            compressed = compress(body, coding)
+            self._cache.put(key, body, compressed)
+        return compressed
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """``StaticFiles`` that serves build-time ``.br``/``.gz`` variants and
+    marks everything as immutable (the mounted files are content-hashed)."""
+
+    def file_response(
+        self,
+        full_path: os.PathLike | str,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        coding = negotiate(request_headers.get("accept-encoding", ""))
+        response = None
+        if coding is not None:
+            variant = f"{full_path}{_SUFFIX[coding]}"
+            try:
+                variant_stat = os.stat(variant)
+            except OSError:
+                variant_stat = None
+            if variant_stat is not None:
+                response = FileResponse(
+                    variant,
+                    status_code=status_code,
+                    stat_result=variant_stat,
+                    media_type=mimetypes.guess_type(str(full_path))[0] or "text/plain",
+                    headers={"Content-Encoding": coding, "Vary": "Accept-Encoding"},
+                )
+        if response is None:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        response.headers["Cache-Control"] = IMMUTABLE
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+def precompress_tree(root: Path, minimum_size: int = MIN_SIZE) -> int:
+    """Write .br/.gz siblings for compressible files; keep them only if smaller."""
+    written = 0
+    for path in sorted(root.rglob("*")):
+        if not path.is_file() or path.suffix not in COMPRESSIBLE_SUFFIXES:
+            continue
+        data = path.read_bytes()
+        if len(data) < minimum_size:
+            continue
+        for coding, suffix in _SUFFIX.items():
+            packed = compress(data, coding, _STATIC_LEVEL[coding])
+            if len(packed) < len(data):
+                path.with_name(path.name + suffix).write_bytes(packed)
+                written += 1
+    return written
+
+
+if __name__ == "__main__":
+    target = Path(sys.argv[1] if len(sys.argv) > 1 else "static")
+    print(f"precompressed {precompress_tree(target)} files under {target}")
@@ -0,0 +1,119 @@
+"""In-process pub/sub feeding the ``/project/{id}/events`` change stream.
+
+Commits happen on threadpool threads; subscribers live on the event loop.
+``publish`` serializes each ``ProjectChange`` once and hands the bytes to
+every subscriber of that project with ``call_soon_threadsafe``, so writers
+never wait for readers.
+
+Each subscriber has a bounded queue. A subscriber that falls behind is not
+allowed to hold memory or slow anyone down: its backlog is dropped and it
+receives a single ``resync`` message telling the client to refetch.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from starlette.concurrency import run_in_threadpool
+
+from .models import ProjectChange
+from .storage import ProjectRepository
+
+DEFAULT_QUEUE_SIZE = int(os.environ.get("GRIDPERMIT_EVENT_QUEUE", "64"))
+# How often commits made by other worker processes are picked up while
+# anyone is subscribed.
+FEED_POLL_SECONDS = float(os.environ.get("GRIDPERMIT_FEED_POLL", "1.0"))
+
+RESYNC = b"resync"
+
+
+class Subscription:
+    """One client's view of a project's changes."""
+
+    def __init__(self, project_id: str, loop: asyncio.AbstractEventLoop, size: int) -> None:
+        self.project_id = project_id
+        self.loop = loop
+        self.queue: asyncio.Queue[tuple[int, bytes]] = asyncio.Queue(size)
+
+    def offer(self, version: int, data: bytes) -> None:
+        """Enqueue on the loop thread; on overflow replace the backlog with a resync."""
+        try:
+            self.queue.put_nowait((version, data))
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait((version, RESYNC))
+
+    async def get(self) -> tuple[int, bytes]:
+        return await self.queue.get()
+
+
+class ProjectEventBroker:
+    def __init__(self, queue_size: int = DEFAULT_QUEUE_SIZE) -> None:
+        self._queue_size = max(queue_size, 1)
+        self._subscribers: dict[str, set[Subscription]] = {}
+        self._lock = threading.Lock()
+        self._repository: ProjectRepository | None = None
+        self._poller: asyncio.Task | None = None
+
+    def attach(self, repository: ProjectRepository) -> None:
+        """Publish every commit of ``repository``."""
+        if repository is self._repository:
+            return
+        self._repository = repository
+        repository.add_listener(self.publish)
+
+    def publish(self, change: ProjectChange) -> None:
+        """Fan ``change`` out to its project's subscribers. Safe from any thread."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(change.project_id, ()))
+        if not subscribers:
+            return
+        data = change.model_dump_json().encode()
+        for sub in subscribers:
+            try:
+                sub.loop.call_soon_threadsafe(sub.offer, change.version, data)
+            except RuntimeError:
+                pass  # loop already closed; the subscription is going away
+
+    def subscriber_count(self, project_id: str | None = None) -> int:
+        with self._lock:
+            if project_id is not None:
+                return len(self._subscribers.get(project_id, ()))
+            return sum(len(subs) for subs in self._subscribers.values())
+
+    @asynccontextmanager
+    async def subscribe(self, project_id: str) -> AsyncIterator[Subscription]:
+        sub = Subscription(project_id, asyncio.get_running_loop(), self._queue_size)
+        with self._lock:
+            self._subscribers.setdefault(project_id, set()).add(sub)
+        self._ensure_poller()
+        try:
+            yield sub
+        finally:
+            with self._lock:
+                subs = self._subscribers.get(project_id)
+                if subs is not None:
+                    subs.discard(sub)
+                    if not subs:
+                        del self._subscribers[project_id]
+
+    # -- other processes ----------------------------------------------------
+
+    def _ensure_poller(self) -> None:
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.get_running_loop().create_task(self._poll())
+
+    async def _poll(self) -> None:
+        """Pull other workers' commits through ``sync`` while anyone listens."""
+        while self.subscriber_count():
+            await asyncio.sleep(FEED_POLL_SECONDS)
+            if self._repository is not None:
+                await run_in_threadpool(self._repository.sync)
+
+
+broker = ProjectEventBroker()
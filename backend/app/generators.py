@@ -0,0 +1,811 @@
+"""Mock text generators for ``/ai/generate-field``.
+
+Field texts are registered once under ``(task_template_id, field_name, lang)``
+and only the requested entry is rendered. Fields without an entry fall back
+to a generic text picked by an ordered rule list, compiled into a single
+regular expression (first matching rule wins, as in a chain of ``if``s).
+
+Rendered texts are kept in ``text_cache``, keyed by the project fields the
+texts are made of (``GENERATOR_INPUTS``) rather than the project version,
+so task progress does not invalidate them. ``generate_text`` is the async
+entry point the API uses; it goes to a model server instead when one is
+configured (see ``text_backend``). ``stream_field_text`` passes a model's
+text on as it streams in, and hands other texts out in word chunks.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import AsyncIterator, Callable, Hashable, Iterable, Iterator, Mapping, Optional
+
+from . import text_backend
+from .models import FormField, Project
+from .singleflight import SingleFlight
+
+FieldGenerator = Callable[[Project], str]
+
+_GENERATORS: dict[tuple[str, str, str], FieldGenerator] = {}
+
+
+def _constant(text: str) -> FieldGenerator:
+    return lambda p: text
+
+
+def register(lang: str, generators: Mapping[tuple[str, str], "FieldGenerator | str"]) -> None:
+    """Register ``(task_template_id, field_name) -> generator or fixed text``."""
+    for (task_tpl_id, field_name), gen in generators.items():
+        _GENERATORS[(task_tpl_id, field_name, lang)] = gen if callable(gen) else _constant(gen)
+
+
+def _lang(lang: str) -> str:
+    return "en" if lang == "en" else "de"
+
+
+class TextCache:
+    """LRU cache of generated texts, bounded by memory size and age.
+
+    ``max_bytes`` counts the size of the cached strings; ``ttl`` (seconds)
+    bounds how long a text is served before it is generated again.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float) -> None:
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, tuple[str, float, int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:  # expired
+                self._drop(key)
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, text: str) -> None:
+        size = sys.getsizeof(text)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (text, time.monotonic() + self.ttl, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop(self, key: Hashable) -> None:
+        self._bytes -= self._entries.pop(key)[2]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+text_cache = TextCache(
+    max_bytes=int(os.environ.get("GRIDPERMIT_AI_CACHE_BYTES", str(16 * 1024 * 1024))),
+    ttl=float(os.environ.get("GRIDPERMIT_AI_CACHE_TTL", "3600")),
+)
+
+# Everything of a project the generators read. Texts only change with these
+# (and with the field and language), not with task progress.
+GENERATOR_INPUTS = ("name", "kv_level", "technology", "length_km", "states_crossed")
+
+
+def _cache_key(
+    project: Project, task_tpl_id: str, field_name: str, field_label: str, lang: str
+) -> tuple:
+    inputs = tuple(
+        tuple(v) if isinstance(v, list) else v
+        for v in (getattr(project, name) for name in GENERATOR_INPUTS)
+    )
+    return (project.id, inputs, task_tpl_id, field_name, field_label, lang)
+
+
+def generate_field_text(
+    project: Project,
+    task_tpl_id: str,
+    field_name: str,
+    field_label: str,
+    lang: str = "de",
+    context: Optional[Mapping[str, str]] = None,
+) -> str:
+    """Generate realistic regulatory text for any form field."""
+    lang = _lang(lang)
+    key = _cache_key(project, task_tpl_id, field_name, field_label, lang)
+    text = text_cache.get(key)
+    if text is None:
+        text = _render(project, task_tpl_id, field_name, field_label, lang, context)
+        text_cache.put(key, text)
+    return text
+
+
+def _render(
+    project: Project,
+    task_tpl_id: str,
+    field_name: str,
+    field_label: str,
+    lang: str,
+    context: Optional[Mapping[str, str]],
+) -> str:
+    gen = _GENERATORS.get((task_tpl_id, field_name, lang))
+    if gen is not None:
+        return gen(project)
+    return fallback_text(project, field_name, field_label, lang, context or {})
+
+
+_model_requests: SingleFlight[Optional[str]] = SingleFlight()
+
+
+async def generate_text(
+    project: Project,
+    task_tpl_id: str,
+    field_name: str,
+    field_label: str,
+    lang: str = "de",
+    context: Optional[Mapping[str, str]] = None,
+) -> str:
+    """``generate_field_text``, or the configured model backend if there is one.
+
+    A model also sees the form context, so its texts are cached per project
+    version. When the backend is overloaded, slow or failing, the generic
+    fallback text is returned (and not cached).
+    """
+    service = text_backend.service
+    if service is None:
+        return generate_field_text(project, task_tpl_id, field_name, field_label, lang, context)
+    lang = _lang(lang)
+    key = _model_key(project, task_tpl_id, field_name, field_label, lang)
+    text = text_cache.get(key)
+    if text is not None:
+        return text
+    request = _model_request(project, task_tpl_id, field_name, field_label, lang, context)
+    # Identical requests already on their way to the model share its answer.
+    text = await _model_requests.run(key, lambda: service.generate(request))
+    if text is None:
+        return fallback_text(project, field_name, field_label, lang, context)
+    text_cache.put(key, text)
+    return text
+
+
+def _model_key(
+    project: Project, task_tpl_id: str, field_name: str, field_label: str, lang: str
+) -> tuple:
+    return _cache_key(project, task_tpl_id, field_name, field_label, lang) + (project.version,)
+
+
+def _model_request(
+    project: Project,
+    task_tpl_id: str,
+    field_name: str,
+    field_label: str,
+    lang: str,
+    context: Optional[Mapping[str, str]],
+) -> text_backend.TextRequest:
+    return text_backend.TextRequest(
+        task_template_id=task_tpl_id,
+        field_name=field_name,
+        field_label=field_label,
+        lang=lang,
+        project={name: getattr(project, name) for name in GENERATOR_INPUTS},
+        context=dict(context or {}),
+    )
+
+
+# A "token" is a word with the whitespace around it.
+_WORD = re.compile(r"\s*\S+\s*|\s+")
+STREAM_CHUNK_WORDS = 3
+
+
+def iter_chunks(text: str, words: int = STREAM_CHUNK_WORDS) -> Iterator[str]:
+    """Split ``text`` into chunks of ``words`` words; joined they give ``text`` back."""
+    tokens = _WORD.findall(text)
+    for i in range(0, len(tokens), words):
+        yield "".join(tokens[i:i + words])
+
+
+async def stream_field_text(
+    project: Project,
+    task_tpl_id: str,
+    field_name: str,
+    field_label: str,
+    lang: str = "de",
+    context: Optional[Mapping[str, str]] = None,
+) -> AsyncIterator[str]:
+    """``generate_text`` as a stream of chunks.
+
+    A configured model streams its text straight through, so the first
+    chunk arrives as soon as the model sends it. If it fails before that,
+    the fallback text is streamed instead; after that, ``BackendError``
+    propagates.
+    """
+    service = text_backend.service
+    if service is not None:
+        lang = _lang(lang)
+        key = _model_key(project, task_tpl_id, field_name, field_label, lang)
+        text = text_cache.get(key)
+        if text is None:
+            request = _model_request(project, task_tpl_id, field_name, field_label, lang, context)
+            parts = []
+            async for chunk in service.stream(request):
+                parts.append(chunk)
+                yield chunk
+            if parts:
+                text_cache.put(key, "".join(parts))
+                return
+            text = fallback_text(project, field_name, field_label, lang, context)
+    else:
+        text = generate_field_text(project, task_tpl_id, field_name, field_label, lang, context)
+    for chunk in iter_chunks(text):
+        yield chunk
+        await asyncio.sleep(0)  # let the server flush each chunk
+
+
+async def generate_task_texts(
+    project: Project,
+    task_tpl_id: str,
+    fields: Iterable[FormField],
+    lang: str = "de",
+    context: Optional[Mapping[str, str]] = None,
+) -> dict[str, str]:
+    """Generate every text field of one task (date fields are left to the user).
+
+    The fields are requested concurrently, so a model backend gets them as
+    one batch.
+    """
+    fields = [f for f in fields if f.type != "date"]
+    texts = await asyncio.gather(*(
+        generate_text(project, task_tpl_id, f.name, f.label, lang, context) for f in fields
+    ))
+    return {f.name: text for f, text in zip(fields, texts)}
+
+
+# ── German texts keyed by (task_template_id, field_name) ──
+register("de", {
+    # Stage 1 - Rechtsrahmen
+    ("s1_t1", "rechtsrahmen"): lambda p: (
+        f"Das Vorhaben \"{p.name}\" ist als länderübergreifende Höchstspannungsleitung "
+        f"({p.kv_level} kV {p.technology}) im Bundesbedarfsplan (BBPlG) enthalten. "
+        f"Gemäß § 2 Abs. 1 NABEG findet das NABEG Anwendung, da das Vorhaben die "
+        f"Bundesländer {' und '.join(p.states_crossed)} quert und eine Spannungsebene "
+        f"≥ 220 kV aufweist. Die Bundesfachplanung nach §§ 4–17 NABEG ist durchzuführen."
+    ),
+    ("s1_t1", "zustaendige_behoerde"): "Bundesnetzagentur (BNetzA), Referat für Netzausbau",
+    ("s1_t1", "begruendung"): lambda p: (
+        f"Die Zuordnung zum NABEG ergibt sich aus der Kennzeichnung im BBPlG als "
+        f"länderübergreifend (§ 2 Abs. 1 BBPlG). Die BNetzA ist gemäß § 31 NABEG "
+        f"zuständige Behörde. Das Vorhaben quert die Bundesländer "
+        f"{' und '.join(p.states_crossed)} auf einer Länge von {p.length_km} km."
+    ),
+    # Stage 1 - Projektsteckbrief
+    ("s1_t2", "vorhaben_titel"): lambda p: p.name,
+    ("s1_t2", "technologie"): lambda p: f"HGÜ ({p.technology}), {p.kv_level} kV, gemischte Bauweise (Freileitung/Erdkabel)",
+    ("s1_t2", "trassenlaenge"): lambda p: f"{p.length_km} km",
+    ("s1_t2", "bundeslaender"): lambda p: ", ".join(p.states_crossed),
+    ("s1_t2", "zusammenfassung"): lambda p: (
+        f"Neubau einer {p.kv_level}-kV-HGÜ-Verbindung ({p.technology}) als Teil des "
+        f"Nord-Süd-Links zur Übertragung von Windenergie aus Norddeutschland in die "
+        f"Verbrauchszentren Süddeutschlands. Die Trasse verläuft in gemischter Bauweise "
+        f"über {p.length_km} km durch {' und '.join(p.states_crossed)}. Das Vorhaben "
+        f"dient der Umsetzung der Energiewende und ist im Bundesbedarfsplan als "
+        f"vordringlicher Bedarf gekennzeichnet."
+    ),
+    # Stage 1 - Stakeholder
+    ("s1_t3", "behoerden"): (
+        "• Bundesnetzagentur (BNetzA) – Genehmigungsbehörde\n"
+        "• Regierung von Oberfranken – Raumordnung BY\n"
+        "• Regierungspräsidium Kassel – Raumordnung HE\n"
+        "• Bayerisches Landesamt für Umwelt (LfU)\n"
+        "• HLNUG Hessen"
+    ),
+    ("s1_t3", "eigentuemer"): (
+        f"• Eigentümergruppe A – Flurstück BY-091-223-17 (privat, nicht kontaktiert)\n"
+        f"• Gemeinde Demohausen – Flurstück HE-044-887-03 (kommunal, Verhandlung eingeleitet)"
+    ),
+    ("s1_t3", "verbaende"): (
+        "• BUND Landesverband Bayern\n• NABU Hessen\n"
+        "• LBV Bayern\n• Bürgerinitiative Trassenalternative e.V."
+    ),
+    # Stage 2 - Korridore
+    ("s2_t1", "korridor_a"): (
+        f"Westlicher Korridor: Verlauf entlang BAB A7, Länge 76,3 km, überwiegend "
+        f"Freileitung. Querung von 2 FFH-Gebieten, Waldanteil 18%. "
+        f"Minimaler Siedlungsabstand 450 m."
+    ),
+    ("s2_t1", "korridor_b"): (
+        f"Östlicher Korridor: Trassenführung parallel zur DB-Strecke, 72,8 km, "
+        f"Erdkabelanteil 35%. Querung von 1 FFH-Gebiet, Waldanteil 12%. "
+        f"Gute Bündelungsmöglichkeit mit Bahninfrastruktur."
+    ),
+    ("s2_t1", "vorzugskorridor"): "Korridor B (östlich)",
+    ("s2_t1", "begruendung_auswahl"): (
+        "Korridor B wird empfohlen: (1) geringere FFH-Betroffenheit, "
+        "(2) kürzere Strecke, (3) bessere Infrastrukturbündelung, "
+        "(4) geringerer Gesamtraumwiderstand (Klasse II vs. III)."
+    ),
+    # Stage 2 - GIS
+    ("s2_t2", "schutzgebiete"): (
+        "• FFH-Gebiet 'Waldgebiet östlich Demo': 2,3 km Querung\n"
+        "• Wasserschutzgebiet Zone III: 1,1 km Randberührung"
+    ),
+    ("s2_t2", "waldanteil"): (
+        f"Waldquerung ca. 8,7 km (12% der Gesamtstrecke). "
+        f"Überwiegend Wirtschaftswald (Fichte), 2,1 km Laubmischwald mit Biotopfunktion."
+    ),
+    ("s2_t2", "siedlungsabstand"): (
+        "• Musterstadt: 320 m (Freileitung)\n"
+        "• Demohausen: 220 m (Erdkabel geplant)\n"
+        "• Beispielhof: 580 m (Freileitung)"
+    ),
+    ("s2_t2", "konflikte"): (
+        "2 Geometrie-Konflikte >5m:\n"
+        "• BY-091-223-17: Überlappung mit Maststandort M-34\n"
+        "• HE-044-887-03: Erdkabeltrasse tangiert Gemeindestraße"
+    ),
+    # Stage 2 - Bericht
+    ("s2_t3", "methodik"): (
+        "Raumwiderstandsanalyse nach BNetzA-Leitfaden (2023), 3-stufiges "
+        "Bewertungsverfahren: (1) Raumwiderstandskartierung 1:25.000, "
+        "(2) Multikriterielle Bewertung mit 14 Kriterien, "
+        "(3) Gesamtabwägung inkl. technischer Realisierbarkeit."
+    ),
+    ("s2_t3", "bewertungsergebnis"): (
+        "Korridor B: Raumwiderstandsklasse II (mittel) – 67/100 Pkt.\n"
+        "Korridor A: Raumwiderstandsklasse III (hoch) – 48/100 Pkt."
+    ),
+    ("s2_t3", "empfehlung"): (
+        "Empfehlung: Weiterverfolgung Korridor B (östlich) als Vorzugskorridor "
+        "in der Bundesfachplanung."
+    ),
+    # Stage 3 - Artenschutz
+    ("s3_t1", "betroffene_arten"): (
+        "• Rotmilan (Milvus milvus) – 3 Brutpaare im 1-km-Radius\n"
+        "• Schwarzstorch (Ciconia nigra) – 1 Horst, 800 m Abstand\n"
+        "• Fledermäuse (Myotis spp.) – Quartiersverdacht bei km 34,5"
+    ),
+    ("s3_t1", "kartierungsstatus"): (
+        "Brutzeitfenster-Kartierung für Rotmilan und Schwarzstorch läuft. "
+        "Fledermaus-Detektorbegehungen zu 60% abgeschlossen. "
+        "Frist: 20.02.2026."
+    ),
+    ("s3_t1", "vermeidungsmassnahmen"): (
+        "• Bauzeitenregelung: Keine Bauarbeiten März–Juli im Umkreis "
+        "von 500 m um Rotmilan-Horste\n"
+        "• Vogelschutzmarker an Erdseilen im Bereich km 12–18\n"
+        "• Ökologische Baubegleitung während der gesamten Bauphase\n"
+        "• Nächtliches Bauverbot im Bereich der Fledermausquartiere"
+    ),
+    ("s3_t1", "kompensation"): (
+        "• Ersatzhabitat Rotmilan: Anlage von 3 ha extensivem Grünland "
+        "als Nahrungshabitat (Verhältnis 1:1,5)\n"
+        "• Fledermauskästen: Installation von 20 Kästen in angrenzenden "
+        "Waldbeständen\n"
+        "• CEF-Maßnahme Schwarzstorch: Beruhigungszone 500 m um Horst"
+    ),
+    # Stage 3 - Scoping
+    ("s3_t2", "schutzgueter"): (
+        "• Mensch (Wohnen, Erholung): Siedlungsabstände, Lärmimmissionen\n"
+        "• Tiere/Pflanzen/Biodiversität: FFH-Verträglichkeit, Artenschutz\n"
+        "• Boden/Fläche: Versiegelung, Bodenverdichtung bei Erdkabel\n"
+        "• Wasser: WSG Zone III Betroffenheit, Grundwasserschutz\n"
+        "• Klima/Luft: Kaltluftschneisen, Waldrodung\n"
+        "• Landschaft: Sichtbarkeit Freileitungsmasten, Landschaftsbild\n"
+        "• Kulturelles Erbe: Bodendenkmäler im Trassenbereich"
+    ),
+    ("s3_t2", "untersuchungsraum"): (
+        f"Untersuchungsraum: 1.000 m beiderseits der Trassenachse (Korridor B). "
+        f"Gesamtfläche ca. 145 km². Abgrenzung basierend auf der Reichweite "
+        f"relevanter Wirkfaktoren (EMF, Schall, visuelle Wirkung). "
+        f"Erweiterter Untersuchungsraum (3 km) für avifaunistische Kartierung."
+    ),
+    ("s3_t2", "methodik_umwelt"): (
+        "UVP-Methodik gemäß § 16 UVPG:\n"
+        "1. Bestandsaufnahme: Auswertung vorhandener Daten + Geländekartierung\n"
+        "2. Wirkungsprognose: Überlagerung Empfindlichkeit × Wirkintensität\n"
+        "3. Bewertung: 5-stufige Erheblichkeitsskala (nicht erheblich bis sehr hoch)\n"
+        "4. Maßnahmenkonzept: Vermeidung, Minimierung, Kompensation\n"
+        "5. Variantenvergleich: Gegenüberstellung der Umweltauswirkungen"
+    ),
+    # Stage 3 - Forstanfrage
+    ("s3_t3", "empfaenger"): (
+        "Amt für Ernährung, Landwirtschaft und Forsten (AELF)\n"
+        "Abteilung Forsten\nBeispielstraße 12\n95000 Musterstadt"
+    ),
+    ("s3_t3", "betreff"): lambda p: (
+        f"Anfrage zur Waldumwandlung gemäß Art. 9 BayWaldG – "
+        f"Vorhaben \"{p.name}\""
+    ),
+    ("s3_t3", "anschreiben"): lambda p: (
+        f"Sehr geehrte Damen und Herren,\n\n"
+        f"im Rahmen des Vorhabens \"{p.name}\" ({p.kv_level} kV {p.technology}, "
+        f"Bundesfachplanung nach NABEG) ist die Inanspruchnahme von Waldflächen "
+        f"im Bereich des Korridors B (östlich) erforderlich.\n\n"
+        f"Betroffen sind ca. 8,7 km Waldquerung (12% der Gesamtstrecke von "
+        f"{p.length_km} km), davon:\n"
+        f"• ca. 6,6 km Wirtschaftswald (Fichte)\n"
+        f"• ca. 2,1 km Laubmischwald mit Biotopfunktion\n\n"
+        f"Wir bitten um eine frühzeitige Abstimmung hinsichtlich:\n"
+        f"1. Umfang der erforderlichen Waldumwandlungsgenehmigung\n"
+        f"2. Anforderungen an den Waldausgleich\n"
+        f"3. Mögliche Auflagen und Bedingungen\n\n"
+        f"Die detaillierten Unterlagen sind als Anlagen beigefügt.\n\n"
+        f"Mit freundlichen Grüßen"
+    ),
+    ("s3_t3", "anlagen"): (
+        "1. Übersichtskarte Trassenführung im Waldbereich (1:10.000)\n"
+        "2. Bestandskarte Waldtypen (1:5.000)\n"
+        "3. Flächenaufstellung der betroffenen Flurstücke\n"
+        "4. Vorläufiges Konzept zum Waldausgleich\n"
+        "5. Auszug aus dem Korridoralternativenbericht (DOC-017, v0.9)"
+    ),
+})
+
+
+# ── English texts keyed by (task_template_id, field_name) ──
+register("en", {
+    # Stage 1 - Rechtsrahmen
+    ("s1_t1", "rechtsrahmen"): lambda p: (
+        f'The project "{p.name}" is listed as a cross-state extra-high voltage line '
+        f"({p.kv_level} kV {p.technology}) in the Federal Requirements Plan (BBPlG). "
+        f"Pursuant to \u00a7 2(1) NABEG, NABEG applies as the project crosses the federal states "
+        f"{' and '.join(p.states_crossed)} and has a voltage level \u2265 220 kV. "
+        f"Federal sectoral planning pursuant to \u00a7\u00a7 4\u201317 NABEG is required."
+    ),
+    ("s1_t1", "zustaendige_behoerde"): "Federal Network Agency (BNetzA), Grid Expansion Division",
+    ("s1_t1", "begruendung"): lambda p: (
+        f"The assignment to NABEG results from the designation in the BBPlG as cross-state "
+        f"(\u00a7 2(1) BBPlG). The BNetzA is the responsible authority pursuant to \u00a7 31 NABEG. "
+        f"The project crosses the federal states "
+        f"{' and '.join(p.states_crossed)} over a length of {p.length_km} km."
+    ),
+    # Stage 1 - Projektsteckbrief
+    ("s1_t2", "vorhaben_titel"): lambda p: p.name,
+    ("s1_t2", "technologie"): lambda p: f"HVDC ({p.technology}), {p.kv_level} kV, mixed construction (overhead line/underground cable)",
+    ("s1_t2", "trassenlaenge"): lambda p: f"{p.length_km} km",
+    ("s1_t2", "bundeslaender"): lambda p: ", ".join(p.states_crossed),
+    ("s1_t2", "zusammenfassung"): lambda p: (
+        f"Construction of a {p.kv_level} kV HVDC connection ({p.technology}) as part of "
+        f"the North-South Link for transmitting wind energy from northern Germany to "
+        f"consumption centers in southern Germany. The route runs in mixed construction "
+        f"over {p.length_km} km through {' and '.join(p.states_crossed)}. The project "
+        f"serves the implementation of the energy transition and is designated as a "
+        f"priority need in the Federal Requirements Plan."
+    ),
+    # Stage 1 - Stakeholder
+    ("s1_t3", "behoerden"): (
+        "• Federal Network Agency (BNetzA) \u2013 Permitting authority\n"
+        "• Government of Upper Franconia \u2013 Spatial planning BY\n"
+        "• District Government Kassel \u2013 Spatial planning HE\n"
+        "• Bavarian State Office for the Environment (LfU)\n"
+        "• HLNUG Hesse"
+    ),
+    ("s1_t3", "eigentuemer"): (
+        "• Owner Group A \u2013 Parcel BY-091-223-17 (private, not contacted)\n"
+        "• Municipality Demohausen \u2013 Parcel HE-044-887-03 (municipal, negotiation initiated)"
+    ),
+    ("s1_t3", "verbaende"): (
+        "• BUND State Association Bavaria\n• NABU Hesse\n"
+        "• LBV Bavaria\n• Citizens' Initiative Route Alternative e.V."
+    ),
+    # Stage 2 - Korridore
+    ("s2_t1", "korridor_a"): (
+        "Western Corridor: Routing along BAB A7, length 76.3 km, predominantly overhead "
+        "line. Crossing of 2 FFH areas, forest share 18%. Minimum settlement distance 450 m."
+    ),
+    ("s2_t1", "korridor_b"): (
+        "Eastern Corridor: Routing parallel to DB railway line, 72.8 km, underground cable "
+        "share 35%. Crossing of 1 FFH area, forest share 12%. Good bundling potential with "
+        "railway infrastructure."
+    ),
+    ("s2_t1", "vorzugskorridor"): "Corridor B (eastern)",
+    ("s2_t1", "begruendung_auswahl"): (
+        "Corridor B is recommended: (1) lower FFH impact, (2) shorter route, "
+        "(3) better infrastructure bundling, (4) lower overall spatial resistance "
+        "(Class II vs. III)."
+    ),
+    # Stage 2 - GIS
+    ("s2_t2", "schutzgebiete"): (
+        "• FFH area 'Forest area east of Demo': 2.3 km crossing\n"
+        "• Water protection zone III: 1.1 km edge contact"
+    ),
+    ("s2_t2", "waldanteil"): (
+        "Forest crossing approx. 8.7 km (12% of total route). Predominantly commercial "
+        "forest (spruce), 2.1 km mixed deciduous forest with biotope function."
+    ),
+    ("s2_t2", "siedlungsabstand"): (
+        "• Musterstadt: 320 m (overhead line)\n"
+        "• Demohausen: 220 m (underground cable planned)\n"
+        "• Beispielhof: 580 m (overhead line)"
+    ),
+    ("s2_t2", "konflikte"): (
+        "2 geometry conflicts >5m:\n"
+        "• BY-091-223-17: Overlap with mast location M-34\n"
+        "• HE-044-887-03: Underground cable route tangent to municipal road"
+    ),
+    # Stage 2 - Bericht
+    ("s2_t3", "methodik"): (
+        "Spatial resistance analysis per BNetzA guideline (2023), 3-stage assessment: "
+        "(1) Spatial resistance mapping 1:25,000, (2) Multi-criteria assessment with "
+        "14 criteria, (3) Overall evaluation incl. technical feasibility."
+    ),
+    ("s2_t3", "bewertungsergebnis"): (
+        "Corridor B: Spatial resistance class II (medium) \u2013 67/100 pts.\n"
+        "Corridor A: Spatial resistance class III (high) \u2013 48/100 pts."
+    ),
+    ("s2_t3", "empfehlung"): (
+        "Recommendation: Continue with Corridor B (eastern) as preferred corridor "
+        "in federal sectoral planning."
+    ),
+    # Stage 3 - Artenschutz
+    ("s3_t1", "betroffene_arten"): (
+        "• Red kite (Milvus milvus) \u2013 3 breeding pairs within 1 km radius\n"
+        "• Black stork (Ciconia nigra) \u2013 1 nest, 800 m distance\n"
+        "• Bats (Myotis spp.) \u2013 Roost suspicion at km 34.5"
+    ),
+    ("s3_t1", "kartierungsstatus"): (
+        "Breeding season survey for red kite and black stork ongoing. "
+        "Bat detector surveys 60% completed. Deadline: 20.02.2026."
+    ),
+    ("s3_t1", "vermeidungsmassnahmen"): (
+        "• Construction timing restriction: No construction March\u2013July within 500 m "
+        "of red kite nests\n"
+        "• Bird protection markers on earth wires in section km 12\u201318\n"
+        "• Ecological construction supervision throughout\n"
+        "• Night construction ban near bat roosts"
+    ),
+    ("s3_t1", "kompensation"): (
+        "• Red kite replacement habitat: Creation of 3 ha extensive grassland as "
+        "foraging habitat (ratio 1:1.5)\n"
+        "• Bat boxes: Installation of 20 boxes in adjacent forest\n"
+        "• CEF measure black stork: Buffer zone 500 m around nest"
+    ),
+    # Stage 3 - Scoping
+    ("s3_t2", "schutzgueter"): (
+        "• Humans (residential, recreation): Settlement distances, noise emissions\n"
+        "• Wildlife/flora/biodiversity: FFH compatibility, species protection\n"
+        "• Soil/land use: Sealing, soil compaction for underground cable\n"
+        "• Water: WPA Zone III impact, groundwater protection\n"
+        "• Climate/air: Cold air corridors, forest clearing\n"
+        "• Landscape: Visibility of overhead line masts, landscape character\n"
+        "• Cultural heritage: Ground monuments in route area"
+    ),
+    ("s3_t2", "untersuchungsraum"): (
+        f"Study area: 1,000 m on both sides of the route axis (Corridor B). "
+        f"Total area approx. 145 km\u00b2. Delimitation based on the range of relevant "
+        f"impact factors (EMF, noise, visual impact). Extended study area (3 km) for "
+        f"avifaunal surveys."
+    ),
+    ("s3_t2", "methodik_umwelt"): (
+        "EIA methodology pursuant to \u00a7 16 UVPG:\n"
+        "1. Baseline survey: Analysis of existing data + field mapping\n"
+        "2. Impact assessment: Overlay of sensitivity \u00d7 impact intensity\n"
+        "3. Evaluation: 5-level significance scale (not significant to very high)\n"
+        "4. Mitigation concept: Avoidance, minimization, compensation\n"
+        "5. Alternatives comparison: Comparison of environmental impacts"
+    ),
+    # Stage 3 - Forstanfrage
+    ("s3_t3", "empfaenger"): (
+        "Office for Food, Agriculture and Forestry (AELF)\n"
+        "Forestry Department\nBeispielstra\u00dfe 12\n95000 Musterstadt"
+    ),
+    ("s3_t3", "betreff"): lambda p: (
+        f'Request for forest conversion pursuant to Art. 9 BayWaldG \u2013 '
+        f'Project "{p.name}"'
+    ),
+    ("s3_t3", "anschreiben"): lambda p: (
+        f"Dear Sir or Madam,\n\n"
+        f'In the context of the project "{p.name}" ({p.kv_level} kV {p.technology}, '
+        f"federal sectoral planning under NABEG), the use of forest areas in the area "
+        f"of Corridor B (eastern) is required.\n\n"
+        f"Affected: approx. 8.7 km forest crossing (12% of total route of "
+        f"{p.length_km} km), thereof:\n"
+        f"\u2022 approx. 6.6 km commercial forest (spruce)\n"
+        f"\u2022 approx. 2.1 km mixed deciduous forest with biotope function\n\n"
+        f"We request early coordination regarding:\n"
+        f"1. Scope of required forest conversion permit\n"
+        f"2. Requirements for forest compensation\n"
+        f"3. Possible conditions and stipulations\n\n"
+        f"Detailed documents are enclosed.\n\n"
+        f"Yours sincerely"
+    ),
+    ("s3_t3", "anlagen"): (
+        "1. Overview map of route in forest area (1:10,000)\n"
+        "2. Forest type inventory map (1:5,000)\n"
+        "3. List of affected parcels\n"
+        "4. Preliminary forest compensation concept\n"
+        "5. Extract from corridor alternatives report (DOC-017, v0.9)"
+    ),
+})
+
+
+# ---------------------------------------------------------------------------
+# Generic fallback for fields without a registered generator
+# ---------------------------------------------------------------------------
+
+# Ordered rules: (rule, substrings of the field name, substrings of the label).
+# A rule matches if any of its substrings occurs; the first matching rule wins.
+_FALLBACK_RULES: tuple[tuple[str, tuple[str, ...], tuple[str, ...]], ...] = (
+    ("recipient", ("empfaenger",), ("empfänger",)),
+    ("subject", ("betreff",), ()),
+    ("letter", ("anschreiben", "schreiben"), ()),
+    ("justification", ("begruendung",), ("begründung",)),
+    ("methodology", ("methodik",), ()),
+    ("summary", ("zusammenfassung", "beschreibung", "ergebnis"), ()),
+    ("attachments", ("anlagen",), ()),
+)
+
+
+def _compile_rules(rules) -> re.Pattern[str]:
+    # Matched against "name\nlabel". Each alternative is a set of lookaheads
+    # followed by an empty group named after the rule; alternatives are tried
+    # in order at the start of the string, so ``lastgroup`` is the first rule
+    # that applies, independent of where the substrings occur.
+    def terms(words: tuple[str, ...]) -> str:
+        return "|".join(re.escape(w) for w in words)
+
+    alternatives = []
+    for rule, name_terms, label_terms in rules:
+        conditions = [rf"(?=[^\n]*(?:{terms(name_terms)}))"]
+        if label_terms:
+            conditions.append(rf"(?=[^\n]*\n[^\n]*(?:{terms(label_terms)}))")
+        alternatives.append(f"(?:{'|'.join(conditions)})(?P<{rule}>)")
+    return re.compile("|".join(alternatives))
+
+
+_FALLBACK_MATCHER = _compile_rules(_FALLBACK_RULES)
+
+
+@lru_cache(maxsize=1024)
+def _fallback_rule(field_name: str, field_label: str) -> str:
+    # Newline separates name from label, so neither may contain one.
+    name = field_name.lower().replace("\n", " ")
+    label = field_label.lower().replace("\n", " ")
+    subject = f"{name}\n{label}"
+    match = _FALLBACK_MATCHER.match(subject)
+    return match.lastgroup if match else "draft"
+
+
+FallbackText = Callable[[Project, str], str]
+
+_FALLBACK_TEXTS: dict[str, dict[str, FallbackText]] = {
+    "de": {
+        "recipient": lambda p, label: (
+            "Bundesnetzagentur\nReferat für Netzausbau\n"
+            "Tulpenfeld 4\n53113 Bonn"
+        ),
+        "subject": lambda p, label: (
+            f"Betr.: Vorhaben \"{p.name}\" – {p.kv_level} kV {p.technology} – {label}"
+        ),
+        "letter": lambda p, label: (
+            f"Sehr geehrte Damen und Herren,\n\n"
+            f"im Rahmen des Vorhabens \"{p.name}\" ({p.kv_level} kV {p.technology}) "
+            f"übersenden wir Ihnen die nachfolgenden Unterlagen zur Prüfung.\n\n"
+            f"Das Vorhaben erstreckt sich über {p.length_km} km durch die Bundesländer "
+            f"{' und '.join(p.states_crossed)}.\n\n"
+            f"Für Rückfragen stehen wir Ihnen jederzeit zur Verfügung.\n\n"
+            f"Mit freundlichen Grüßen"
+        ),
+        "justification": lambda p, label: (
+            f"Die Maßnahme ist erforderlich im Rahmen des Vorhabens \"{p.name}\" "
+            f"({p.kv_level} kV {p.technology}). Die Notwendigkeit ergibt sich aus "
+            f"der Einstufung im Bundesbedarfsplan als Vorhaben mit vordringlichem Bedarf "
+            f"zur Sicherstellung der Versorgungssicherheit."
+        ),
+        "methodology": lambda p, label: (
+            "Die Bewertung erfolgt nach anerkannten Methoden gemäß dem aktuellen "
+            "BNetzA-Leitfaden. Es wird ein mehrstufiges Verfahren angewandt, das "
+            "quantitative und qualitative Kriterien berücksichtigt."
+        ),
+        "summary": lambda p, label: (
+            f"Das Vorhaben \"{p.name}\" umfasst den Neubau einer {p.kv_level}-kV-"
+            f"HGÜ-Leitung ({p.technology}) über {p.length_km} km durch "
+            f"{' und '.join(p.states_crossed)}. "
+            f"Die gemischte Bauweise (Freileitung/Erdkabel) trägt den örtlichen "
+            f"Gegebenheiten Rechnung."
+        ),
+        "attachments": lambda p, label: (
+            "1. Übersichtskarte (1:25.000)\n"
+            "2. Detailkarten der betroffenen Abschnitte\n"
+            "3. Technische Erläuterungen\n"
+            "4. Relevante Gutachten und Nachweise"
+        ),
+        "draft": lambda p, label: (
+            f"[{label}] – Entwurf für das Vorhaben \"{p.name}\" "
+            f"({p.kv_level} kV {p.technology}, {p.length_km} km, "
+            f"Bundesländer: {', '.join(p.states_crossed)}). "
+            f"Dieser Textbaustein wurde automatisch generiert und sollte "
+            f"fachlich geprüft und ergänzt werden."
+        ),
+    },
+    "en": {
+        "recipient": lambda p, label: (
+            "Federal Network Agency\nGrid Expansion Division\n"
+            "Tulpenfeld 4\n53113 Bonn"
+        ),
+        "subject": lambda p, label: (
+            f'Re: Project "{p.name}" – {p.kv_level} kV {p.technology} – {label}'
+        ),
+        "letter": lambda p, label: (
+            f"Dear Sir or Madam,\n\n"
+            f'In the context of the project "{p.name}" ({p.kv_level} kV {p.technology}), '
+            f"we submit the following documents for review.\n\n"
+            f"The project extends over {p.length_km} km through the federal states "
+            f"{' and '.join(p.states_crossed)}.\n\n"
+            f"We are available for any questions.\n\n"
+            f"Yours sincerely"
+        ),
+        "justification": lambda p, label: (
+            f'The measure is required within the scope of the project "{p.name}" '
+            f"({p.kv_level} kV {p.technology}). The necessity arises from the designation "
+            f"in the Federal Requirements Plan as a priority need project to ensure "
+            f"security of supply."
+        ),
+        "methodology": lambda p, label: (
+            "The assessment follows recognized methods per the current BNetzA guideline. "
+            "A multi-stage procedure is applied that considers quantitative and qualitative "
+            "criteria."
+        ),
+        "summary": lambda p, label: (
+            f'The project "{p.name}" comprises the construction of a {p.kv_level} kV '
+            f"HVDC line ({p.technology}) over {p.length_km} km through "
+            f"{' and '.join(p.states_crossed)}. The mixed construction (overhead line/"
+            f"underground cable) takes local conditions into account."
+        ),
+        "attachments": lambda p, label: (
+            "1. Overview map (1:25,000)\n"
+            "2. Detailed maps of affected sections\n"
+            "3. Technical explanations\n"
+            "4. Relevant reports and evidence"
+        ),
+        "draft": lambda p, label: (
+            f'[{label}] – Draft for the project "{p.name}" '
+            f"({p.kv_level} kV {p.technology}, {p.length_km} km, "
+            f"Federal states: {', '.join(p.states_crossed)}). "
+            f"This text block was automatically generated and should be reviewed "
+            f"and supplemented by experts."
+        ),
+    },
+}
+
+
+def fallback_text(
+    project: Project,
+    field_name: str,
+    field_label: str,
+    lang: str = "de",
+    context: Optional[Mapping[str, str]] = None,
+) -> str:
+    """Generate generic text for fields not in the registry."""
+    rule = _fallback_rule(field_name, field_label)
+    return _FALLBACK_TEXTS[_lang(lang)][rule](project, field_label)
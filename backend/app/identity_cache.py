@@ -0,0 +1,39 @@
+"""Small thread-safe LRU for values derived from one particular object.
+
+Each entry remembers the object it was computed from (its "owner") and is
+only handed out for that very object, so a key such as ``id(obj)`` can
+never return a value computed for a different object that reuses a freed
+id. Holding the owner also keeps its id from being reused while the entry
+lives.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any, Generic, Hashable, Optional, TypeVar
+
+V = TypeVar("V")
+
+
+class IdentityCache(Generic[V]):
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self._entries: OrderedDict[Hashable, tuple[Any, V]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, owner: Any) -> Optional[V]:
+        """The value stored under ``key`` for ``owner`` itself, else ``None``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] is not owner:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: Hashable, owner: Any, value: V) -> None:
+        with self._lock:
+            self._entries[key] = (owner, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
@@ -1,13 +1,15 @@
 import os
 from pathlib import Path
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from fastapi.staticfiles import StaticFiles
 
+from . import storage
 from .api import router
+from .compression import CompressionMiddleware, PrecompressedStaticFiles
+from .events import broker
 from .mock_db import seed_demo_data
+from .static_cache import StaticCache
 
 app = FastAPI(
     title="GridPermit Guide API",
@@ -23,22 +25,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(CompressionMiddleware)
+
 app.include_router(router, prefix="/api")
 
 # Serve built frontend in production
 STATIC_DIR = Path(__file__).resolve().parent.parent / "static"
 if STATIC_DIR.is_dir():
-    app.mount("/assets", StaticFiles(directory=STATIC_DIR / "assets"), name="assets")
+    app.mount("/assets", PrecompressedStaticFiles(directory=STATIC_DIR / "assets"), name="assets")
+
+    spa_files = StaticCache.load(STATIC_DIR, exclude=("assets",))
 
     @app.get("/{full_path:path}")
     async def serve_spa(request: Request, full_path: str):
         """Serve index.html for all non-API routes (SPA fallback)."""
-        file_path = STATIC_DIR / full_path
-        if file_path.is_file():
-            return FileResponse(file_path)
-        return FileResponse(STATIC_DIR / "index.html")
+        entry = spa_files.lookup(full_path)
+        if entry is None:
+            raise HTTPException(404, "Frontend not built")
+        return spa_files.response(entry, request.headers)
 
 
 @app.on_event("startup")
 def on_startup():
     seed_demo_data()
+    broker.attach(storage.repository)
@@ -1,4 +1,4 @@
-"""In-memory database with rich demo data."""
+"""Demo data seeding for the project repository."""
 
 from __future__ import annotations
 
@@ -26,8 +26,8 @@ from .models import (
     TaskStatus,
     VerfahrensPfad,
 )
-
-projects: dict[str, Project] = {}
+from .storage import repository
+from .workflow_engine import index_project
 
 DEMO_PROJECT_ID = "P-DE-TSO-001"
 
@@ -541,4 +541,6 @@ def seed_demo_data() -> None:
         ],
     )
 
-    projects[demo.id] = demo
+    index_project(demo)
+    # Only seed a fresh store; persisted progress survives restarts.
+    repository.add_if_missing(demo)
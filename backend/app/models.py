@@ -3,9 +3,9 @@ from __future__ import annotations
 import uuid
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import Literal, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 
 # --- Enums ---
@@ -70,12 +70,31 @@ class TaskInstance(BaseModel):
     updated_at: Optional[datetime] = None
 
 
+class TaskEvent(BaseModel):
+    """One task transition as recorded in the append-only event log.
+
+    ``form_data`` only carries keys that changed; ``removed_fields`` lists
+    keys that were dropped. ``completed_checklist`` is None when untouched.
+    """
+    task_id: str
+    status: TaskStatus
+    form_data: dict = Field(default_factory=dict)
+    removed_fields: list[str] = Field(default_factory=list)
+    completed_checklist: Optional[list[int]] = None
+    updated_at: datetime
+    version: int = 0  # project version this event produced
+
+
 class StageInstance(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     template_id: str
     status: StageStatus = StageStatus.PENDING
     tasks: list[TaskInstance]
 
+    # Task counters, maintained by workflow_engine (index_project / evaluate_task_change)
+    _done: int = PrivateAttr(default=0)
+    _started: int = PrivateAttr(default=0)
+
 
 # --- Section & permit models ---
 
@@ -221,6 +240,7 @@ class Project(BaseModel):
     is_cross_border: bool = False
     is_multi_state: bool = False
     current_stage_index: int = 0
+    version: int = 0  # bumped on every committed mutation
     stages: list[StageInstance] = Field(default_factory=list)
     blockers: list[Blocker] = Field(default_factory=list)
     geo_layers: list[GeoLayer] = Field(default_factory=list)
@@ -236,6 +256,49 @@ class Project(BaseModel):
     permits: list[PermitStatus] = Field(default_factory=list)
     created_at: datetime = Field(default_factory=datetime.now)
 
+    # task id -> TaskRef, maintained by workflow_engine.index_project
+    _task_index: dict = PrivateAttr(default_factory=dict)
+    # merged form data of all tasks (workflow_engine.FormContext), same lifecycle
+    _form_context: object = PrivateAttr(default=None)
+
+
+# --- Portfolio summaries ---
+
+class ProjectSummary(BaseModel):
+    """Fixed-size portfolio view of a project, kept up to date on every write."""
+    id: str
+    name: str
+    pfad: VerfahrensPfad
+    kv_level: int
+    version: int
+    current_stage_index: int
+    section_count: int
+    tasks_total: int
+    tasks_done: int
+    progress: float  # tasks_done / tasks_total
+    blocker_count: int
+    created_at: datetime
+
+
+class ProjectSummaryPage(BaseModel):
+    items: list[dict]  # ProjectSummary, optionally projected to ?fields=
+    next_cursor: Optional[str] = None
+
+
+# --- Change stream ---
+
+class ProjectChange(BaseModel):
+    """Pushed to ``/project/{id}/events`` subscribers after each commit.
+
+    ``stages`` and ``current_stage_index`` are only filled in when the
+    publishing process has the project loaded.
+    """
+    project_id: str
+    version: int
+    tasks: list[TaskEvent]
+    stages: dict[str, StageStatus] = Field(default_factory=dict)
+    current_stage_index: Optional[int] = None
+
 
 # --- API schemas ---
 
@@ -249,6 +312,39 @@ class TaskCompleteRequest(BaseModel):
     completed_checklist: list[int] = Field(default_factory=list)
 
 
+class TaskOperation(BaseModel):
+    task_id: str
+    action: Literal["save", "complete", "reopen"]
+    form_data: Optional[dict] = None  # None keeps the current form data
+    completed_checklist: Optional[list[int]] = None
+
+
+class TaskBatchRequest(BaseModel):
+    operations: list[TaskOperation]
+
+
+class TaskPatchResponse(BaseModel):
+    """Minimal answer to a task mutation with ``?delta=true``.
+
+    ``patch`` is a JSON Patch (RFC 6902) against the project as returned
+    by ``GET /project/{id}/workflow`` at ``base_version``. It only applies
+    to a copy of exactly that version; any other copy must be refetched.
+    """
+    status: str = "ok"
+    version: int
+    base_version: int
+    patch: list[dict]
+
+
+class TaskBatchResponse(BaseModel):
+    status: str = "ok"
+    applied: int
+    current_stage_index: int
+    version: int
+    tasks: dict[str, TaskStatus]  # task id -> resulting status
+    stages: dict[str, StageStatus]  # touched stage id -> resulting status
+
+
 class AIFieldRequest(BaseModel):
     project_id: str
     task_instance_id: str
@@ -261,6 +357,35 @@ class AIFieldResponse(BaseModel):
     text: str
 
 
+class AITaskRequest(BaseModel):
+    project_id: str
+    task_instance_id: str
+    lang: str = "de"
+
+
+class AITaskResponse(BaseModel):
+    fields: dict[str, str]  # field name -> generated text
+
+
+class AIStageRequest(BaseModel):
+    project_id: str
+    stage_instance_id: str
+    lang: str = "de"
+
+
+class AIStageResponse(BaseModel):
+    tasks: dict[str, dict[str, str]]  # task instance id -> field name -> text
+
+
+class TemplateRef(BaseModel):
+    """Points at the cacheable body of ``GET /api/template/{pfad}``."""
+    pfad: VerfahrensPfad
+    lang: str
+    etag: str
+    url: str
+
+
 class WorkflowResponse(BaseModel):
     project: Project
-    template: ProcessTemplate
+    template_ref: TemplateRef
+    template: Optional[ProcessTemplate] = None  # only with ?include_template=true
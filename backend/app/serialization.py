@@ -0,0 +1,79 @@
+"""Direct-to-bytes JSON encoding for the hot read responses.
+
+FastAPI's default path validates a returned model against ``response_model``,
+converts it to plain Python objects and only then JSON-encodes it. Here
+models are encoded once, straight to bytes, by pydantic-core's serializer.
+
+Most of a project never changes after it has been loaded: no endpoint
+mutates anything but task/stage state. The encodings of those lists are
+cached per list object and spliced into the output, so a response only
+pays for encoding sections, stages and scalars.
+"""
+
+from __future__ import annotations
+
+from pydantic import BaseModel, TypeAdapter
+
+from .identity_cache import IdentityCache
+from .models import Project, TemplateRef
+
+# Project fields no endpoint mutates in place. Code that changes one of
+# them must assign a new list, which naturally misses the cache.
+IMMUTABLE_PROJECT_FIELDS = (
+    "blockers",
+    "geo_layers",
+    "land_parcels",
+    "stakeholders",
+    "historical_cases",
+    "documents",
+    "project_tasks",
+    "risks",
+    "regulatory_requirements",
+    "draft_templates",
+    "permits",
+)
+_EXCLUDE = set(IMMUTABLE_PROJECT_FIELDS)
+_ADAPTERS = {
+    name: TypeAdapter(Project.model_fields[name].annotation) for name in IMMUTABLE_PROJECT_FIELDS
+}
+
+_FRAGMENT_CACHE_SIZE = 2048
+# id(list) -> its JSON
+_fragments: IdentityCache[bytes] = IdentityCache(_FRAGMENT_CACHE_SIZE)
+
+
+def model_json(model: BaseModel) -> bytes:
+    return model.__pydantic_serializer__.to_json(model)
+
+
+def _fragment(name: str, value: list) -> bytes:
+    encoded = _fragments.get(id(value), value)
+    if encoded is None:
+        encoded = _ADAPTERS[name].dump_json(value)
+        _fragments.put(id(value), value, encoded)
+    return encoded
+
+
+def project_json(project: Project) -> bytes:
+    """Encode ``project``; same JSON as ``model_dump_json`` up to key order."""
+    head = Project.__pydantic_serializer__.to_json(project, exclude=_EXCLUDE)
+    parts = [head[:-1]]
+    for name in IMMUTABLE_PROJECT_FIELDS:
+        parts.append(b',"%s":' % name.encode())
+        parts.append(_fragment(name, getattr(project, name)))
+    parts.append(b"}")
+    return b"".join(parts)
+
+
+def projects_json(projects: list[Project]) -> bytes:
+    return b"[" + b",".join(project_json(p) for p in projects) + b"]"
+
+
+def workflow_json(project: Project, template_ref: TemplateRef, template: bytes | None) -> bytes:
+    """Encode a ``WorkflowResponse``; ``template`` is the pre-serialized template, if any."""
+    return b"".join((
+        b'{"project":', project_json(project),
+        b',"template_ref":', model_json(template_ref),
+        b',"template":', template if template is not None else b"null",
+        b"}",
+    ))
@@ -0,0 +1,43 @@
+"""Coalescing of identical concurrent computations ("single flight").
+
+The first caller for a key starts the computation; callers arriving while
+it is still running await the same result instead of starting their own.
+Nothing is kept once the flight lands, so keys should include whatever
+makes a result current (e.g. the project version).
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    def __init__(self) -> None:
+        self._flights: dict[Hashable, asyncio.Future[T]] = {}
+        self.started = 0  # computations actually run
+        self.joined = 0  # callers served by someone else's computation
+
+    async def run(self, key: Hashable, compute: Callable[[], Awaitable[T]]) -> T:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = asyncio.ensure_future(compute())
+            self._flights[key] = flight
+            flight.add_done_callback(lambda f: self._land(key, f))
+            self.started += 1
+        else:
+            self.joined += 1
+        # A caller that goes away (client disconnect) must not cancel the
+        # flight for everyone else.
+        return await asyncio.shield(flight)
+
+    def _land(self, key: Hashable, flight: asyncio.Future[T]) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.cancelled():
+            flight.exception()  # mark retrieved even if every caller left
+
+    def __len__(self) -> int:
+        return len(self._flights)
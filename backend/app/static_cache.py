@@ -0,0 +1,127 @@
+"""Preloaded SPA files: read once at startup, served from memory.
+
+``StaticCache.load`` walks the build output once and keeps every file's
+bytes (memory-mapped above ``MMAP_THRESHOLD``), its content type, a
+content-hash ETag, Last-Modified and any ``.br``/``.gz`` sibling written by
+``python -m app.compression``. Serving a path is then a dict lookup; no
+request, including the ``index.html`` fallback for deep links, touches the
+filesystem.
+
+The build output is baked into the image, so changes on disk after startup
+are not picked up.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import mimetypes
+import mmap
+import os
+from dataclasses import dataclass, field
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Optional, Union
+
+from starlette.datastructures import Headers
+from starlette.responses import Response
+
+from .compression import base_etag, coded_etag, negotiate
+
+MMAP_THRESHOLD = int(os.environ.get("GRIDPERMIT_STATIC_MMAP", str(1024 * 1024)))
+_VARIANTS = {".br": "br", ".gz": "gzip"}
+
+Body = Union[bytes, mmap.mmap]
+
+
+@dataclass
+class StaticFile:
+    body: Body
+    media_type: str
+    etag: str
+    last_modified: str
+    mtime: int
+    variants: dict[str, Body] = field(default_factory=dict)  # coding -> body
+
+
+class _PreloadedResponse(Response):
+    # ``body`` may be an mmap; the server writes any bytes-like object.
+    def render(self, content: Body) -> Body:
+        return content
+
+
+def _read(path: Path) -> Body:
+    size = path.stat().st_size
+    if size < MMAP_THRESHOLD or size == 0:
+        return path.read_bytes()
+    with open(path, "rb") as handle:
+        return mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class StaticCache:
+    def __init__(self, files: dict[str, StaticFile], fallback: str = "index.html") -> None:
+        self.files = files
+        self.fallback = files.get(fallback)
+
+    @classmethod
+    def load(cls, root: Path, exclude: tuple[str, ...] = ()) -> "StaticCache":
+        """Index every file under ``root`` except the top-level ``exclude`` dirs."""
+        files: dict[str, StaticFile] = {}
+        paths = sorted(p for p in root.rglob("*") if p.is_file())
+        for path in paths:
+            rel = path.relative_to(root).as_posix()
+            if rel.split("/", 1)[0] in exclude or path.suffix in _VARIANTS:
+                continue
+            body = _read(path)
+            mtime = int(path.stat().st_mtime)
+            entry = StaticFile(
+                body=body,
+                media_type=mimetypes.guess_type(path.name)[0] or "text/plain",
+                etag='"' + hashlib.sha256(body).hexdigest()[:16] + '"',
+                last_modified=formatdate(mtime, usegmt=True),
+                mtime=mtime,
+            )
+            for suffix, coding in _VARIANTS.items():
+                variant = path.with_name(path.name + suffix)
+                if variant.is_file():
+                    entry.variants[coding] = _read(variant)
+            files[rel] = entry
+        return cls(files)
+
+    def lookup(self, path: str) -> Optional[StaticFile]:
+        """The file at ``path``, or the SPA fallback for client-side routes."""
+        return self.files.get(path) or self.fallback
+
+    def response(self, entry: StaticFile, request_headers: Headers) -> Response:
+        headers = {
+            "ETag": entry.etag,
+            "Last-Modified": entry.last_modified,
+            # Not content-hashed like /assets: always revalidate.
+            "Cache-Control": "no-cache",
+        }
+        coding = None
+        if entry.variants:
+            headers["Vary"] = "Accept-Encoding"
+            coding = negotiate(request_headers.get("accept-encoding", ""))
+            if coding in entry.variants:
+                headers["ETag"] = coded_etag(entry.etag, coding)
+        if _not_modified(entry, request_headers):
+            return Response(status_code=304, headers=headers)
+        body = entry.body
+        if coding in entry.variants:
+            body = entry.variants[coding]
+            headers["Content-Encoding"] = coding
+        return _PreloadedResponse(body, headers=headers, media_type=entry.media_type)
+
+
+def _not_modified(entry: StaticFile, request_headers: Headers) -> bool:
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {base_etag(tag.strip().removeprefix("W/")) for tag in if_none_match.split(",")}
+        return entry.etag in tags or "*" in tags
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return entry.mtime <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
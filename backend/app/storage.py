@@ -0,0 +1,618 @@
+"""Project repository with a bounded write-through cache.
+
+The API never touches a module-level dict directly; it goes through
+``repository``.  Reads of hot projects are served from an in-memory LRU of
+live ``Project`` objects, so only mutations pay for a backend write.
+
+Task transitions are not written as whole projects.  Each one is appended to
+an event log as a compact ``TaskEvent``; a full snapshot is only written on
+creation and every ``GRIDPERMIT_SNAPSHOT_INTERVAL`` events.  Loading a project
+reads its latest snapshot and replays the events recorded after it.
+
+The SQLite backend can be shared by several worker processes on one box
+(``uvicorn --workers N``).  Commits are compare-and-swap on the project
+version, and the event log doubles as a change feed: before serving a
+read, each worker replays other workers' new events onto its cached
+projects (or evicts them if it cannot).
+
+Every write also refreshes a small ``ProjectSummary`` next to the project,
+so the portfolio listing never has to load or replay full projects.
+
+Listeners registered with ``add_listener`` receive a ``ProjectChange`` for
+every commit, local or (once ``sync`` has seen it) from another process.
+
+Backends are selected with the ``GRIDPERMIT_STORE`` environment variable:
+
+* ``sqlite:///path/to/file.db`` – durable embedded store (WAL mode, default)
+* ``memory`` – process-local dict, nothing survives a restart (single worker)
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import logging
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+from .models import Project, ProjectChange, ProjectSummary, TaskEvent
+from .workflow_engine import find_task, index_project, summarize_project, transition_task
+
+DEFAULT_DB_PATH = Path(__file__).resolve().parent.parent / "data" / "gridpermit.db"
+DEFAULT_CACHE_SIZE = int(os.environ.get("GRIDPERMIT_CACHE_SIZE", "128"))
+DEFAULT_SNAPSHOT_INTERVAL = int(os.environ.get("GRIDPERMIT_SNAPSHOT_INTERVAL", "200"))
+
+logger = logging.getLogger(__name__)
+
+
+class StaleProjectError(Exception):
+    """Another writer (usually another worker process) committed first."""
+
+
+class ProjectRepository(ABC):
+    """Backend-agnostic project access with an LRU of hot ``Project`` objects.
+
+    Writers take ``lock(project_id)``, mutate the returned object in place and
+    then call ``save`` or ``commit`` before releasing it; the cached instance
+    therefore always reflects the last committed state.
+    """
+
+    def __init__(
+        self,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        snapshot_interval: int = DEFAULT_SNAPSHOT_INTERVAL,
+    ) -> None:
+        self._cache: OrderedDict[str, Project] = OrderedDict()
+        self._cache_size = max(cache_size, 1)
+        self._cache_lock = threading.Lock()
+        self._snapshot_interval = max(snapshot_interval, 1)
+        self._project_locks: dict[str, threading.RLock] = {}
+        self._project_locks_guard = threading.Lock()
+        self._listeners: list[Callable[[ProjectChange], None]] = []
+
+    # -- public API ---------------------------------------------------------
+
+    def get(self, project_id: str) -> Project | None:
+        self.sync()
+        with self._cache_lock:
+            project = self._cache.get(project_id)
+            if project is not None:
+                self._cache.move_to_end(project_id)
+                return project
+        project = self._load(project_id)
+        if project is not None:
+            self._remember(project)
+        return project
+
+    def get_nowait(self, project_id: str) -> Project | None:
+        """The cached project if serving it needs no load or catch-up, else None.
+
+        Never blocks on I/O or on project locks, so async callers can use it
+        on the event loop and fall back to ``get`` in a thread.
+        """
+        if self._needs_sync():
+            return None
+        with self._cache_lock:
+            project = self._cache.get(project_id)
+            if project is not None:
+                self._cache.move_to_end(project_id)
+            return project
+
+    def save(self, project: Project) -> None:
+        """Write a full snapshot of ``project`` and keep it as the cached instance."""
+        try:
+            self._store(project)
+        except Exception:
+            # Never let a failed write leave a dirty object in the cache.
+            self.evict(project.id)
+            raise
+        self._remember(project)
+
+    def commit(self, project: Project, events: list[TaskEvent]) -> None:
+        """Bump the version and record transitions already applied to ``project``.
+
+        All events are written in one transaction (all or nothing) and cost
+        one small append each; every ``snapshot_interval`` events the project
+        is snapshotted so replay on load stays short. Raises
+        ``StaleProjectError`` if the stored version moved underneath us.
+        On any failure the cached project is evicted, so the next read
+        reloads the last committed state.
+        """
+        project.version += 1
+        for event in events:
+            event.version = project.version
+        try:
+            if self._append(project, events) >= self._snapshot_interval:
+                self._store(project)
+        except Exception:
+            self.evict(project.id)
+            raise
+        self._remember(project)
+        self._notify(project.id, project.version, events, project)
+
+    def add_if_missing(self, project: Project) -> bool:
+        """Insert ``project`` unless its id already exists. Returns True if inserted."""
+        inserted = self._insert_if_missing(project)
+        if inserted:
+            self._remember(project)
+        return inserted
+
+    def list_all(self) -> list[Project]:
+        projects = []
+        for project_id in self._ids():
+            project = self.get(project_id)
+            if project is not None:
+                projects.append(project)
+        return projects
+
+    def list_versions(self) -> list[tuple[str, int]]:
+        """``(id, version)`` of every project, without loading any of them."""
+        return self._versions()
+
+    def list_summaries(
+        self, cursor: str | None = None, limit: int = 50
+    ) -> tuple[list[ProjectSummary], str | None]:
+        """One page of summaries in creation order plus the cursor of the next page.
+
+        Raises ``ValueError`` for a cursor this repository did not hand out.
+        """
+        return self._summaries(cursor, max(limit, 1))
+
+    def lock(self, project_id: str) -> threading.RLock:
+        """Per-project writer lock; writers on different projects never contend.
+
+        The lock is process-local and re-entrant (``sync`` takes it, if it
+        is free, to apply changes from other processes). Across worker processes the
+        version check in ``commit`` keeps writers from overwriting each other.
+        """
+        with self._project_locks_guard:
+            lock = self._project_locks.get(project_id)
+            if lock is None:
+                lock = self._project_locks[project_id] = threading.RLock()
+            return lock
+
+    def add_listener(self, listener: Callable[[ProjectChange], None]) -> None:
+        """Call ``listener`` after every commit; it runs on the committing thread.
+
+        Listeners must not block or read from the repository. They are
+        called with the project lock held, except for another process's
+        commit that ``sync`` sees while a writer holds the project.
+        """
+        self._listeners.append(listener)
+
+    def evict(self, project_id: str) -> None:
+        with self._cache_lock:
+            self._cache.pop(project_id, None)
+
+    def sync(self) -> None:
+        """Bring cached projects up to date with other processes. No-op by default."""
+
+    def _needs_sync(self) -> bool:
+        """True if ``sync`` has work to do. Must be cheap and non-blocking."""
+        return False
+
+    def __contains__(self, project_id: str) -> bool:
+        return self.get(project_id) is not None
+
+    def _notify(
+        self, project_id: str, version: int, events: list[TaskEvent], project: Project | None
+    ) -> None:
+        if not self._listeners:
+            return
+        change = ProjectChange(project_id=project_id, version=version, tasks=events)
+        if project is not None:
+            for event in events:
+                ref = find_task(project, event.task_id)
+                if ref is not None:
+                    change.stages[ref.stage.id] = ref.stage.status
+            change.current_stage_index = project.current_stage_index
+        for listener in self._listeners:
+            try:
+                listener(change)
+            except Exception:
+                # A broken subscriber must never fail a committed write.
+                logger.exception("project change listener failed")
+
+    # -- cache --------------------------------------------------------------
+
+    def _remember(self, project: Project) -> None:
+        with self._cache_lock:
+            self._cache[project.id] = project
+            self._cache.move_to_end(project.id)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+    # -- backend hooks ------------------------------------------------------
+
+    @abstractmethod
+    def _load(self, project_id: str) -> Project | None: ...
+
+    @abstractmethod
+    def _store(self, project: Project) -> None: ...
+
+    @abstractmethod
+    def _append(self, project: Project, events: list[TaskEvent]) -> int:
+        """Persist ``events`` atomically; return the number of events since the last snapshot."""
+
+    @abstractmethod
+    def _insert_if_missing(self, project: Project) -> bool: ...
+
+    @abstractmethod
+    def _ids(self) -> list[str]: ...
+
+    @abstractmethod
+    def _versions(self) -> list[tuple[str, int]]: ...
+
+    @abstractmethod
+    def _summaries(
+        self, cursor: str | None, limit: int
+    ) -> tuple[list[ProjectSummary], str | None]: ...
+
+
+class MemoryProjectRepository(ProjectRepository):
+    """Non-durable, single-process backend. Handy for tests and throwaway demos."""
+
+    def __init__(self, cache_size: int = DEFAULT_CACHE_SIZE) -> None:
+        super().__init__(cache_size)
+        self._projects: dict[str, Project] = {}
+        # Insertion-ordered; a cursor is the position of the next entry.
+        self._summary_by_id: dict[str, ProjectSummary] = {}
+
+    def _load(self, project_id: str) -> Project | None:
+        return self._projects.get(project_id)
+
+    def _store(self, project: Project) -> None:
+        self._projects[project.id] = project
+        self._summary_by_id[project.id] = summarize_project(project)
+
+    def _append(self, project: Project, events: list[TaskEvent]) -> int:
+        # The live object already holds the state; there is nothing to log.
+        self._summary_by_id[project.id] = summarize_project(project)
+        return 0
+
+    def _insert_if_missing(self, project: Project) -> bool:
+        if self._projects.setdefault(project.id, project) is not project:
+            return False
+        self._summary_by_id[project.id] = summarize_project(project)
+        return True
+
+    def _ids(self) -> list[str]:
+        return list(self._projects)
+
+    def _versions(self) -> list[tuple[str, int]]:
+        return [(pid, p.version) for pid, p in self._projects.items()]
+
+    def _summaries(
+        self, cursor: str | None, limit: int
+    ) -> tuple[list[ProjectSummary], str | None]:
+        start = int(cursor) if cursor else 0
+        if start < 0:
+            raise ValueError(cursor)
+        summaries = list(self._summary_by_id.values())
+        end = start + limit
+        return summaries[start:end], str(end) if end < len(summaries) else None
+
+
+class SQLiteProjectRepository(ProjectRepository):
+    """Embedded durable backend: snapshots plus an append-only event log.
+
+    ``projects`` holds one JSON snapshot per project together with the
+    sequence number of the last event it includes; ``task_events`` holds
+    every transition; ``project_heads`` holds each project's committed
+    version and summary and is the compare-and-swap target of ``commit``.
+    Its rowid (creation order) is the pagination cursor of the summaries.
+
+    Each thread gets its own connection (WAL mode), so readers never block
+    each other. Several processes may open the same file.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        snapshot_interval: int = DEFAULT_SNAPSHOT_INTERVAL,
+    ) -> None:
+        super().__init__(cache_size, snapshot_interval)
+        self._path = Path(path)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        # Events appended since the last snapshot, per loaded project.
+        self._tail: dict[str, int] = {}
+        # Change feed position: highest event seq this process has seen.
+        self._writer_id = uuid.uuid4().hex
+        self._feed_lock = threading.Lock()
+        with self._conn() as conn:
+            self._migrate(conn)
+            self._feed_seq = conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM task_events"
+            ).fetchone()[0]
+            missing = [
+                row[0] for row in conn.execute(
+                    "SELECT project_id FROM project_heads WHERE summary IS NULL"
+                )
+            ]
+        self._backfill_summaries(missing)
+
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection) -> None:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS projects ("
+            " id TEXT PRIMARY KEY,"
+            " body TEXT NOT NULL,"
+            " updated_at TEXT NOT NULL,"
+            " snapshot_seq INTEGER NOT NULL DEFAULT 0)"
+        )
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(projects)")}
+        if "snapshot_seq" not in columns:
+            conn.execute("ALTER TABLE projects ADD COLUMN snapshot_seq INTEGER NOT NULL DEFAULT 0")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS task_events ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " project_id TEXT NOT NULL,"
+            " body TEXT NOT NULL,"
+            " version INTEGER NOT NULL DEFAULT 0,"
+            " writer TEXT NOT NULL DEFAULT '')"
+        )
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(task_events)")}
+        if "version" not in columns:
+            conn.execute("ALTER TABLE task_events ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+            conn.execute("UPDATE task_events SET version = COALESCE(json_extract(body, '$.version'), 0)")
+        if "writer" not in columns:
+            conn.execute("ALTER TABLE task_events ADD COLUMN writer TEXT NOT NULL DEFAULT ''")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS task_events_project ON task_events (project_id, seq)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS project_heads ("
+            " project_id TEXT PRIMARY KEY,"
+            " version INTEGER NOT NULL,"
+            " summary TEXT)"
+        )
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(project_heads)")}
+        if "summary" not in columns:
+            conn.execute("ALTER TABLE project_heads ADD COLUMN summary TEXT")
+        conn.execute(
+            "INSERT OR IGNORE INTO project_heads (project_id, version) "
+            "SELECT id, (SELECT COALESCE(MAX(version), 0) FROM task_events e"
+            "            WHERE e.project_id = projects.id) FROM projects"
+        )
+
+    def _backfill_summaries(self, project_ids: list[str]) -> None:
+        """Compute summaries for heads written before summaries existed."""
+        for project_id in project_ids:
+            project = self._load(project_id)
+            if project is None:
+                continue
+            with self._conn() as conn:
+                conn.execute(
+                    "UPDATE project_heads SET summary = ? WHERE project_id = ? AND summary IS NULL",
+                    (summarize_project(project).model_dump_json(), project_id),
+                )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.data_version = None
+        return conn
+
+    # -- change feed --------------------------------------------------------
+
+    def sync(self) -> None:
+        """Catch cached projects up with commits made by other processes.
+
+        ``PRAGMA data_version`` only changes when another connection has
+        committed, so the common case costs one cheap pragma and no query.
+        New events are replayed onto cached projects when they follow on
+        directly from the cached version; otherwise the project is evicted
+        and reloaded on the next read.
+        """
+        conn = self._conn()
+        data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._local.data_version:
+            return
+        self._local.data_version = data_version
+        # The cursor only moves once the events are applied: a concurrent
+        # reader that finds nothing new past it must find them in the cache.
+        with self._feed_lock:
+            rows = conn.execute(
+                "SELECT seq, project_id, version, body FROM task_events"
+                " WHERE seq > ? AND writer != ? ORDER BY seq",
+                (self._feed_seq, self._writer_id),
+            ).fetchall()
+            if not rows:
+                return
+            self._apply_feed(rows)
+            self._feed_seq = max(self._feed_seq, rows[-1][0])
+
+    def _apply_feed(self, rows: list[tuple[int, str, int, str]]) -> None:
+        by_project: dict[str, list[tuple[int, str]]] = {}
+        for _seq, project_id, version, body in rows:
+            by_project.setdefault(project_id, []).append((version, body))
+        for project_id, events in by_project.items():
+            # Never wait for another project's lock here: ``get`` runs this
+            # while its caller may hold a lock, so two threads could each
+            # wait for the other's. If a writer holds the project, evict it
+            # instead; the writer's commit then fails the version check and
+            # retries on a fresh load.
+            lock = self.lock(project_id)
+            locked = lock.acquire(blocking=False)
+            try:
+                with self._cache_lock:
+                    project = self._cache.get(project_id)
+                if project is not None and not (locked and self._catch_up(project, events)):
+                    self.evict(project_id)
+                    project = None
+                if self._listeners:
+                    # One notification per commit; events of a commit share its version.
+                    commits: dict[int, list[TaskEvent]] = {}
+                    for version, body in events:
+                        commits.setdefault(version, []).append(TaskEvent.model_validate_json(body))
+                    for version, commit_events in commits.items():
+                        self._notify(project_id, version, commit_events, project)
+            finally:
+                if locked:
+                    lock.release()
+
+    def _needs_sync(self) -> bool:
+        conn = self._conn()
+        data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._local.data_version:
+            return False
+        # Something committed, but maybe only this process or a sync on
+        # another thread has already applied it.
+        pending = conn.execute(
+            "SELECT EXISTS (SELECT 1 FROM task_events WHERE seq > ? AND writer != ?)",
+            (self._feed_seq, self._writer_id),
+        ).fetchone()[0]
+        if not pending:
+            self._local.data_version = data_version
+        return bool(pending)
+
+    @staticmethod
+    def _catch_up(project: Project, events: list[tuple[int, str]]) -> bool:
+        """Replay feed events onto ``project``; False if there is a version gap."""
+        applying = None  # events of one commit share its version
+        for version, body in events:
+            if version <= project.version and version != applying:
+                continue
+            if version != project.version + 1 and version != applying:
+                return False
+            event = TaskEvent.model_validate_json(body)
+            ref = find_task(project, event.task_id)
+            if ref is None:
+                return False
+            transition_task(project, ref, event)
+            project.version = applying = version
+        return True
+
+    # -- backend hooks ------------------------------------------------------
+
+    def _load(self, project_id: str) -> Project | None:
+        conn = self._conn()
+        # One read transaction so the snapshot and its tail are consistent.
+        conn.execute("BEGIN")
+        try:
+            row = conn.execute(
+                "SELECT body, snapshot_seq FROM projects WHERE id = ?", (project_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            tail = conn.execute(
+                "SELECT body FROM task_events WHERE project_id = ? AND seq > ? ORDER BY seq",
+                (project_id, row[1]),
+            ).fetchall()
+        finally:
+            conn.execute("COMMIT")
+        project = index_project(Project.model_validate_json(row[0]))
+        for (body,) in tail:
+            event = TaskEvent.model_validate_json(body)
+            ref = find_task(project, event.task_id)
+            if ref is not None:
+                transition_task(project, ref, event)
+            project.version = max(project.version, event.version)
+        self._tail[project_id] = len(tail)
+        return project
+
+    def _store(self, project: Project) -> None:
+        with self._conn() as conn:
+            # The snapshot covers exactly the events up to its own version,
+            # even if another process has appended newer ones meanwhile.
+            conn.execute(
+                "INSERT INTO projects (id, body, updated_at, snapshot_seq) VALUES (?, ?, ?, "
+                " (SELECT COALESCE(MAX(seq), 0) FROM task_events"
+                "  WHERE project_id = ? AND version <= ?)) "
+                "ON CONFLICT(id) DO UPDATE SET body = excluded.body,"
+                " updated_at = excluded.updated_at, snapshot_seq = excluded.snapshot_seq "
+                "WHERE excluded.snapshot_seq >= projects.snapshot_seq",
+                (
+                    project.id, project.model_dump_json(), datetime.now().isoformat(),
+                    project.id, project.version,
+                ),
+            )
+            # Refresh the summary only if no newer version has been committed.
+            conn.execute(
+                "INSERT INTO project_heads (project_id, version, summary) VALUES (?, ?, ?) "
+                "ON CONFLICT(project_id) DO UPDATE SET summary = excluded.summary "
+                "WHERE project_heads.version = excluded.version",
+                (project.id, project.version, summarize_project(project).model_dump_json()),
+            )
+        self._tail[project.id] = 0
+
+    def _append(self, project: Project, events: list[TaskEvent]) -> int:
+        with self._conn() as conn:
+            cur = conn.execute(
+                "UPDATE project_heads SET version = ?, summary = ?"
+                " WHERE project_id = ? AND version = ?",
+                (
+                    project.version, summarize_project(project).model_dump_json(),
+                    project.id, project.version - 1,
+                ),
+            )
+            if cur.rowcount != 1:
+                raise StaleProjectError(project.id)
+            conn.executemany(
+                "INSERT INTO task_events (project_id, body, version, writer) VALUES (?, ?, ?, ?)",
+                [
+                    (project.id, e.model_dump_json(exclude_defaults=True), e.version, self._writer_id)
+                    for e in events
+                ],
+            )
+        tail = self._tail.get(project.id, 0) + len(events)
+        self._tail[project.id] = tail
+        return tail
+
+    def _insert_if_missing(self, project: Project) -> bool:
+        with self._conn() as conn:
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO projects (id, body, updated_at) VALUES (?, ?, ?)",
+                (project.id, project.model_dump_json(), datetime.now().isoformat()),
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO project_heads (project_id, version, summary) VALUES (?, ?, ?)",
+                (project.id, project.version, summarize_project(project).model_dump_json()),
+            )
+        return cur.rowcount == 1
+
+    def _ids(self) -> list[str]:
+        rows = self._conn().execute("SELECT id FROM projects ORDER BY rowid").fetchall()
+        return [r[0] for r in rows]
+
+    def _versions(self) -> list[tuple[str, int]]:
+        return self._conn().execute(
+            "SELECT project_id, version FROM project_heads ORDER BY rowid"
+        ).fetchall()
+
+    def _summaries(
+        self, cursor: str | None, limit: int
+    ) -> tuple[list[ProjectSummary], str | None]:
+        after = int(cursor) if cursor else 0
+        # One row more than asked for tells us whether there is a next page.
+        rows = self._conn().execute(
+            "SELECT rowid, summary FROM project_heads"
+            " WHERE rowid > ? AND summary IS NOT NULL ORDER BY rowid LIMIT ?",
+            (after, limit + 1),
+        ).fetchall()
+        page = [ProjectSummary.model_validate_json(body) for _rowid, body in rows[:limit]]
+        return page, str(rows[limit - 1][0]) if len(rows) > limit else None
+
+
+def create_repository(url: str | None = None) -> ProjectRepository:
+    """Build a repository from a store URL (see module docstring)."""
+    url = url or os.environ.get("GRIDPERMIT_STORE", f"sqlite:///{DEFAULT_DB_PATH}")
+    if url == "memory":
+        return MemoryProjectRepository()
+    if url.startswith("sqlite:///"):
+        return SQLiteProjectRepository(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported GRIDPERMIT_STORE: {url!r}")
+
+
+repository: ProjectRepository = create_repository()
@@ -0,0 +1,127 @@
+"""Stand-in model server for the text backend protocol (stdlib only).
+
+    python -m app.stub_model_server --port 8090 --delay 0.5
+    GRIDPERMIT_AI_BACKEND=http://127.0.0.1:8090/generate uvicorn app.main:app
+
+Answers every request with a short text naming the field and project.
+``--delay`` is added per call (not per request), like a model that has to
+spin up for a batch; ``--fail-rate`` makes that share of calls return 500
+and ``--drop-rate`` that share hang up halfway through the status line.
+``POST .../stream`` sends one request's text word by word, spreading the
+delay over the words. ``GET /stats`` reports the number of calls, the batch
+sizes and the number of streams seen.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def stub_text(request: dict) -> str:
+    project = request.get("project", {})
+    name = project.get("name", "")
+    if request.get("lang") == "en":
+        return f"[model] {request['field_label']} for the project \"{name}\"."
+    return f"[Modell] {request['field_label']} für das Vorhaben \"{name}\"."
+
+
+class StubModelServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        delay: float = 0.0,
+        fail_rate: float = 0.0,
+        drop_rate: float = 0.0,
+    ) -> None:
+        super().__init__(address, _Handler)
+        self.delay = delay
+        self.fail_rate = fail_rate
+        self.drop_rate = drop_rate
+        self.batch_sizes: list[int] = []
+        self.streams = 0
+        self.lock = threading.Lock()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: StubModelServer
+    protocol_version = "HTTP/1.1"  # for chunked streams
+
+    def do_POST(self) -> None:
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        if random.random() < self.server.drop_rate:
+            self.wfile.write(b"HTTP/1.1 20")
+            self.close_connection = True
+            return
+        if self.path.endswith("/stream"):
+            self._stream(payload["request"])
+            return
+        requests = payload.get("requests", [])
+        with self.server.lock:
+            self.server.batch_sizes.append(len(requests))
+        time.sleep(self.server.delay)
+        if random.random() < self.server.fail_rate:
+            self._send(500, {"detail": "stub failure"})
+            return
+        self._send(200, {"texts": [stub_text(r) for r in requests]})
+
+    def _stream(self, request: dict) -> None:
+        with self.server.lock:
+            self.server.streams += 1
+        if random.random() < self.server.fail_rate:
+            self._send(500, {"detail": "stub failure"})
+            return
+        words = re.findall(r"\S+\s*", stub_text(request))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for word in words:
+            time.sleep(self.server.delay / len(words))
+            data = word.encode()
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+    def do_GET(self) -> None:
+        with self.server.lock:
+            sizes = list(self.server.batch_sizes)
+            streams = self.server.streams
+        self._send(200, {
+            "calls": len(sizes), "requests": sum(sizes), "batch_sizes": sizes, "streams": streams,
+        })
+
+    def _send(self, status: int, body: dict) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds per call")
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    server = StubModelServer((args.host, args.port), args.delay, args.fail_rate, args.drop_rate)
+    print(f"stub model server on http://{args.host}:{args.port}/generate")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+"""Pluggable text-generation backend behind ``/ai/generate-*``.
+
+Without ``GRIDPERMIT_AI_BACKEND`` the deterministic generators in
+``generators`` answer directly. With it set to a model server URL, field
+requests go through a ``GenerationService``:
+
+* a bounded queue: when it is full, a request is answered with the
+  fallback text right away instead of waiting;
+* at most ``concurrency`` backend calls in flight;
+* micro-batching: the first queued request waits ``batch_window`` for
+  company, then up to ``max_batch`` requests go out in one backend call
+  (more accumulate while all call slots are busy);
+* a deadline per request: on timeout or backend error the caller gets
+  ``None`` and falls back to the generic text.
+
+``GenerationService.stream`` serves ``/ai/generate-field/stream``: one
+request, no batching, sharing the ``concurrency`` slots, with the text
+passed on chunk by chunk as the model produces it.
+
+Everything runs on the event loop with non-blocking I/O, so a slow model
+occupies neither worker threads nor the loop, and the workflow endpoints
+keep their full threadpool.
+
+The HTTP protocol is one POST per batch::
+
+    {"requests": [{"task_template_id", "field_name", "field_label",
+                   "lang", "project": {...}, "context": {...}}, ...]}
+    -> {"texts": ["...", ...]}   (same order)
+
+and, for streaming, one POST per request to the same path plus ``/stream``::
+
+    {"request": {...}}  -> the text as a chunked text/plain body
+
+``python -m app.stub_model_server`` serves it for local testing.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import codecs
+import os
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass, field
+from typing import AsyncIterator, Optional
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+BACKEND_URL = os.environ.get("GRIDPERMIT_AI_BACKEND", "")
+QUEUE_SIZE = int(os.environ.get("GRIDPERMIT_AI_QUEUE", "256"))
+CONCURRENCY = int(os.environ.get("GRIDPERMIT_AI_CONCURRENCY", "4"))
+MAX_BATCH = int(os.environ.get("GRIDPERMIT_AI_BATCH", "8"))
+BATCH_WINDOW = float(os.environ.get("GRIDPERMIT_AI_BATCH_WINDOW_MS", "10")) / 1000
+TIMEOUT = float(os.environ.get("GRIDPERMIT_AI_TIMEOUT", "10"))
+
+
+class BackendError(Exception):
+    pass
+
+
+# What a broken or misbehaving model server raises: refused or dropped
+# connections (EOFError covers IncompleteReadError), garbled responses.
+_BACKEND_ERRORS = (
+    BackendError, OSError, EOFError, asyncio.LimitOverrunError, ValueError, IndexError,
+)
+
+
+@dataclass
+class TextRequest:
+    task_template_id: str
+    field_name: str
+    field_label: str
+    lang: str
+    project: dict  # the generator inputs (name, kv_level, ...)
+    context: dict = field(default_factory=dict)  # merged form data of the project
+
+
+class TextBackend(ABC):
+    """A model that turns a batch of requests into texts, in order."""
+
+    @abstractmethod
+    async def generate(self, requests: list[TextRequest]) -> list[str]: ...
+
+    async def stream(self, request: TextRequest) -> AsyncIterator[str]:
+        """The text for one request, piece by piece as the model produces it.
+
+        Backends that cannot stream hand out the whole text at once.
+        """
+        (text,) = await self.generate([request])
+        yield text
+
+
+class HTTPTextBackend(TextBackend):
+    """Model server speaking the JSON protocol above over plain HTTP/1.1."""
+
+    def __init__(self, url: str) -> None:
+        parts = urlsplit(url)
+        if parts.scheme != "http" or not parts.hostname:
+            raise ValueError(f"Unsupported text backend URL: {url!r}")
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.netloc = parts.netloc
+        self.path = parts.path or "/"
+
+    async def generate(self, requests: list[TextRequest]) -> list[str]:
+        body = json.dumps(
+            {"requests": [asdict(r) for r in requests]}, ensure_ascii=False
+        ).encode()
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            writer.write(
+                f"POST {self.path} HTTP/1.1\r\nHost: {self.netloc}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+                f"Connection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+            status, data = await _read_response(reader)
+        finally:
+            writer.close()
+        if status != 200:
+            raise BackendError(f"Text backend answered {status}")
+        texts = json.loads(data).get("texts")
+        if not isinstance(texts, list) or len(texts) != len(requests):
+            raise BackendError("Text backend returned a malformed batch")
+        return [str(t) for t in texts]
+
+    async def stream(self, request: TextRequest) -> AsyncIterator[str]:
+        body = json.dumps({"request": asdict(request)}, ensure_ascii=False).encode()
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            writer.write(
+                f"POST {self.path.rstrip('/')}/stream HTTP/1.1\r\nHost: {self.netloc}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+                f"Connection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+            status, headers = await _read_head(reader)
+            if status != 200:
+                raise BackendError(f"Text backend answered {status}")
+            # A multi-byte character may be split across chunks.
+            decoder = codecs.getincrementaldecoder("utf-8")()
+            async for data in _iter_body(reader, headers):
+                if text := decoder.decode(data):
+                    yield text
+            if text := decoder.decode(b"", final=True):
+                yield text
+        finally:
+            writer.close()
+
+
+async def _read_head(reader: asyncio.StreamReader) -> tuple[int, dict[str, str]]:
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+    status = int(head[0].split()[1])
+    headers = {}
+    for line in head[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return status, headers
+
+
+async def _iter_body(reader: asyncio.StreamReader, headers: dict[str, str]) -> AsyncIterator[bytes]:
+    """The response body as it arrives (one piece per HTTP chunk)."""
+    if "content-length" in headers:
+        yield await reader.readexactly(int(headers["content-length"]))
+    elif headers.get("transfer-encoding", "").lower() == "chunked":
+        while size := int((await reader.readuntil(b"\r\n")).split(b";")[0], 16):
+            yield await reader.readexactly(size)
+            await reader.readexactly(2)
+    else:
+        yield await reader.read()
+
+
+async def _read_response(reader: asyncio.StreamReader) -> tuple[int, bytes]:
+    status, headers = await _read_head(reader)
+    return status, b"".join([data async for data in _iter_body(reader, headers)])
+
+
+@dataclass
+class _Job:
+    request: TextRequest
+    future: asyncio.Future
+
+
+class GenerationService:
+    def __init__(
+        self,
+        backend: TextBackend,
+        queue_size: int = QUEUE_SIZE,
+        concurrency: int = CONCURRENCY,
+        max_batch: int = MAX_BATCH,
+        batch_window: float = BATCH_WINDOW,
+        timeout: float = TIMEOUT,
+    ) -> None:
+        self.backend = backend
+        self.queue_size = max(queue_size, 1)
+        self.concurrency = max(concurrency, 1)
+        self.max_batch = max(max_batch, 1)
+        self.batch_window = batch_window
+        self.timeout = timeout
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue[_Job] | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._collector: asyncio.Task | None = None
+        self._calls: set[asyncio.Task] = set()
+        self.in_flight = 0
+        self.streams = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self.rejected = 0  # queue full
+        self.timeouts = 0
+        self.failures = 0  # backend errors
+
+    def _ensure_started(self) -> asyncio.Queue[_Job]:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:  # first use, or a new loop (tests)
+            self._loop = loop
+            self._queue = asyncio.Queue(self.queue_size)
+            self._slots = asyncio.Semaphore(self.concurrency)
+            self._collector = loop.create_task(self._collect())
+        return self._queue
+
+    async def generate(self, request: TextRequest) -> Optional[str]:
+        """The backend's text, or ``None`` if it is overloaded, slow or failing."""
+        queue = self._ensure_started()
+        job = _Job(request, self._loop.create_future())
+        try:
+            queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return None
+        try:
+            return await asyncio.wait_for(asyncio.shield(job.future), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            job.future.cancel()  # skipped if it has not been sent yet
+            return None
+
+    async def stream(self, request: TextRequest) -> AsyncIterator[str]:
+        """The backend's text for one request, chunk by chunk.
+
+        Yields nothing if the backend is overloaded, or slow or failing
+        before its first chunk: the caller falls back, as for ``None`` from
+        ``generate``. Each chunk must follow within ``timeout``; a failure
+        after the first one raises ``BackendError``.
+        """
+        self._ensure_started()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            return
+        self.in_flight += 1
+        self.streams += 1
+        chunks = self.backend.stream(request)
+        started = False
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(anext(chunks), self.timeout)
+                except StopAsyncIteration:
+                    return
+                except asyncio.TimeoutError:
+                    self.timeouts += 1
+                    if started:
+                        raise BackendError("Text backend stalled mid-stream")
+                    return
+                except _BACKEND_ERRORS as exc:
+                    self.failures += 1
+                    logger.warning("Text backend failed for a stream: %r", exc)
+                    if started:
+                        raise BackendError(str(exc)) from exc
+                    return
+                started = True
+                yield chunk
+        finally:
+            await chunks.aclose()
+            self.in_flight -= 1
+            self._slots.release()
+
+    async def _collect(self) -> None:
+        # One collector forms batches; while all ``concurrency`` slots are
+        # busy, requests pile up in the queue and the next batch gets bigger.
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            if self.batch_window > 0 and queue.qsize() < self.max_batch - 1:
+                await asyncio.sleep(self.batch_window)
+            await self._slots.acquire()
+            while len(batch) < self.max_batch and not queue.empty():
+                batch.append(queue.get_nowait())
+            batch = [job for job in batch if not job.future.done()]
+            if batch:
+                call = self._loop.create_task(self._run(batch))
+                self._calls.add(call)  # keep a reference until it finishes
+                call.add_done_callback(self._calls.discard)
+            else:
+                self._slots.release()
+
+    async def _run(self, batch: list[_Job]) -> None:
+        self.in_flight += 1
+        self.batches += 1
+        self.batched_requests += len(batch)
+        try:
+            texts: list[Optional[str]] = await asyncio.wait_for(
+                self.backend.generate([job.request for job in batch]), self.timeout
+            )
+        except asyncio.TimeoutError:
+            texts = [None] * len(batch)
+        except _BACKEND_ERRORS as exc:
+            self.failures += 1
+            logger.warning("Text backend failed for a batch of %d: %r", len(batch), exc)
+            texts = [None] * len(batch)
+        except Exception:
+            self.failures += 1
+            logger.exception("Text backend failed for a batch of %d", len(batch))
+            texts = [None] * len(batch)
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+        for job, text in zip(batch, texts):
+            if not job.future.done():
+                job.future.set_result(text)
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "queue_size": self.queue_size,
+            "in_flight": self.in_flight,
+            "concurrency": self.concurrency,
+            "streams": self.streams,
+            "batches": self.batches,
+            "batched_requests": self.batched_requests,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+        }
+
+
+service: Optional[GenerationService] = (
+    GenerationService(HTTPTextBackend(BACKEND_URL)) if BACKEND_URL else None
+)
+
+
+def use_backend(backend: Optional[TextBackend], **options) -> Optional[GenerationService]:
+    """Plug in ``backend`` (``None``: the built-in generators); options as for the service."""
+    global service
+    service = GenerationService(backend, **options) if backend is not None else None
+    return service
@@ -1,14 +1,25 @@
 from __future__ import annotations
 
 import copy
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime
+from types import MappingProxyType
+from typing import Mapping, NamedTuple
 
+from pydantic import TypeAdapter
+
+from .identity_cache import IdentityCache
 from .models import (
     FormField,
     ProcessTemplate,
     Project,
+    ProjectSummary,
+    Section,
     StageInstance,
     StageStatus,
     StageTemplate,
+    TaskEvent,
     TaskInstance,
     TaskStatus,
     TaskTemplate,
@@ -734,6 +745,57 @@ TEMPLATES: dict[tuple[VerfahrensPfad, str], ProcessTemplate] = {
 }
 
 
+# ---------------------------------------------------------------------------
+# Compiled templates (built once at import, read-only afterwards)
+# ---------------------------------------------------------------------------
+
+_STAGE_LIST = TypeAdapter(list[StageInstance])
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    """Field lookup and instance prototypes derived from one ProcessTemplate."""
+    template: ProcessTemplate
+    form_fields: Mapping[str, tuple[FormField, ...]]  # task template id -> fields
+    stage_prototypes: tuple[dict, ...]  # raw StageInstance input, never mutated
+    json: bytes  # the template serialized once, served as-is
+    etag: str  # strong validator of ``json``
+
+    def new_stages(self) -> list[StageInstance]:
+        """Stamp out fresh stage/task instances from the prototypes.
+
+        One validator call over plain prototype data; ids and empty form data
+        come from the model defaults.
+        """
+        return _STAGE_LIST.validate_python(self.stage_prototypes)
+
+
+def compile_template(template: ProcessTemplate) -> CompiledTemplate:
+    body = template.model_dump_json().encode()
+    return CompiledTemplate(
+        template=template,
+        form_fields=MappingProxyType(
+            {t.id: tuple(t.form_fields) for s in template.stages for t in s.tasks}
+        ),
+        stage_prototypes=tuple(
+            {
+                "template_id": s.id,
+                "status": StageStatus.ACTIVE if i == 0 else StageStatus.PENDING,
+                "tasks": [{"template_id": t.id} for t in s.tasks],
+            }
+            for i, s in enumerate(template.stages)
+        ),
+        json=body,
+        etag=f'"{hashlib.sha256(body).hexdigest()[:16]}"',
+    )
+
+
+COMPILED_TEMPLATES: Mapping[tuple[VerfahrensPfad, str], CompiledTemplate] = MappingProxyType(
+    {key: compile_template(tpl) for key, tpl in TEMPLATES.items()}
+)
+_COMPILED_BY_IDENTITY = {id(c.template): c for c in COMPILED_TEMPLATES.values()}
+
+
 # ---------------------------------------------------------------------------
 # Workflow engine functions
 # ---------------------------------------------------------------------------
@@ -742,6 +804,10 @@ def get_template(pfad: VerfahrensPfad, lang: str = "de") -> ProcessTemplate:
     return TEMPLATES[(pfad, lang)]
 
 
+def get_compiled_template(pfad: VerfahrensPfad, lang: str = "de") -> CompiledTemplate:
+    return COMPILED_TEMPLATES[(pfad, lang)]
+
+
 def determine_pfad(kv_level: int) -> VerfahrensPfad:
     if kv_level >= 220:
         return VerfahrensPfad.NABEG
@@ -749,39 +815,36 @@ def determine_pfad(kv_level: int) -> VerfahrensPfad:
 
 
 def create_project_stages(template: ProcessTemplate) -> list[StageInstance]:
-    stages: list[StageInstance] = []
-    for i, stage_tpl in enumerate(template.stages):
-        tasks = [TaskInstance(template_id=t.id) for t in stage_tpl.tasks]
-        stages.append(
-            StageInstance(
-                template_id=stage_tpl.id,
-                status=StageStatus.ACTIVE if i == 0 else StageStatus.PENDING,
-                tasks=tasks,
-            )
-        )
-    return stages
+    compiled = _COMPILED_BY_IDENTITY.get(id(template)) or compile_template(template)
+    return compiled.new_stages()
+
+
+def _count_stage(stage: StageInstance) -> None:
+    stage._done = sum(1 for t in stage.tasks if t.status == TaskStatus.DONE)
+    stage._started = sum(1 for t in stage.tasks if t.status != TaskStatus.PENDING)
+
+
+def _refresh_stage_status(stage: StageInstance) -> None:
+    if stage.tasks and stage._done == len(stage.tasks):
+        stage.status = StageStatus.COMPLETED
+    elif stage._started:
+        stage.status = StageStatus.ACTIVE
 
 
 def evaluate_stage(project: Project, _template: ProcessTemplate) -> Project:
-    """Update stage statuses based on task completion. No locking."""
-    # Evaluate stages within each section
+    """Recount and re-evaluate every stage. No locking.
+
+    Full O(tasks) pass; request handlers use ``evaluate_task_change`` instead.
+    """
     for section in project.sections:
         for stage in section.stages:
-            all_done = all(t.status == TaskStatus.DONE for t in stage.tasks)
-            any_started = any(t.status != TaskStatus.PENDING for t in stage.tasks)
-            if all_done and len(stage.tasks) > 0:
-                stage.status = StageStatus.COMPLETED
-            elif any_started:
-                stage.status = StageStatus.ACTIVE
+            _count_stage(stage)
+            _refresh_stage_status(stage)
 
     # Legacy: evaluate project-level stages too
     for stage in project.stages:
-        all_done = all(t.status == TaskStatus.DONE for t in stage.tasks)
-        any_started = any(t.status != TaskStatus.PENDING for t in stage.tasks)
-        if all_done and len(stage.tasks) > 0:
-            stage.status = StageStatus.COMPLETED
-        elif any_started:
-            stage.status = StageStatus.ACTIVE
+        _count_stage(stage)
+        _refresh_stage_status(stage)
 
     # Update current_stage_index
     for i, stage in enumerate(project.stages):
@@ -794,34 +857,298 @@ def evaluate_stage(project: Project, _template: ProcessTemplate) -> Project:
     return project
 
 
-def find_task_in_project(project: Project, task_id: str) -> tuple[str, int, int] | None:
-    """Search all sections for a task. Returns (section_id, stage_index, task_index) or None."""
-    for section in project.sections:
-        for si, stage in enumerate(section.stages):
-            for ti, task in enumerate(stage.tasks):
-                if task.id == task_id:
-                    return section.id, si, ti
-    # Fallback: search project.stages directly (backward compat)
-    for si, stage in enumerate(project.stages):
+def evaluate_task_change(project: Project, ref: TaskRef, previous: TaskStatus) -> None:
+    """Re-evaluate only the stage containing ``ref`` after its task left ``previous``.
+
+    Constant time: adjusts the stage's done/started counters and moves the
+    ``current_stage_index`` cursor only if a legacy project-level stage flipped.
+    Changes inside sections never move it, so a project without legacy
+    stages keeps its cursor (0 unless stored otherwise).
+    """
+    stage, current = ref.stage, ref.task.status
+    stage._done += (current == TaskStatus.DONE) - (previous == TaskStatus.DONE)
+    stage._started += (current != TaskStatus.PENDING) - (previous != TaskStatus.PENDING)
+    _refresh_stage_status(stage)
+    if ref.section is not None:
+        return
+
+    i = ref.stage_index
+    if stage.status != StageStatus.COMPLETED:
+        if i < project.current_stage_index:
+            project.current_stage_index = i
+    elif i == project.current_stage_index:
+        stages = project.stages
+        while i < len(stages) - 1 and stages[i].status == StageStatus.COMPLETED:
+            i += 1
+        project.current_stage_index = i
+
+
+def evaluate_stages_once(project: Project, refs: list[TaskRef]) -> list[StageInstance]:
+    """Single evaluation pass over the distinct stages touched by ``refs``.
+
+    Used by batch mutations: tasks are changed first via ``apply_task_event``
+    and each affected stage is then recounted exactly once (and each task's
+    form data merged into the generation context).
+    """
+    touched: dict[int, StageInstance] = {}
+    legacy_touched = False
+    for ref in refs:
+        if id(ref.stage) not in touched:
+            touched[id(ref.stage)] = ref.stage
+            legacy_touched = legacy_touched or ref.section is None
+    for stage in touched.values():
+        _count_stage(stage)
+        _refresh_stage_status(stage)
+    for ref in refs:
+        project._form_context.update(ref)
+
+    if legacy_touched:
+        for i, stage in enumerate(project.stages):
+            if stage.status != StageStatus.COMPLETED:
+                project.current_stage_index = i
+                break
+        else:
+            project.current_stage_index = len(project.stages) - 1
+    return list(touched.values())
+
+
+# ---------------------------------------------------------------------------
+# Task index
+# ---------------------------------------------------------------------------
+
+class TaskRef(NamedTuple):
+    """Direct references to a task and its containers."""
+    section: Section | None  # None for legacy project-level stages
+    section_index: int  # -1 for legacy project-level stages
+    stage: StageInstance
+    stage_index: int
+    task: TaskInstance
+    task_index: int
+
+
+def _index_stages(
+    index: dict[str, TaskRef], section: Section | None, section_index: int, stages: list[StageInstance]
+) -> None:
+    for si, stage in enumerate(stages):
+        _count_stage(stage)
         for ti, task in enumerate(stage.tasks):
-            if task.id == task_id:
-                return "", si, ti
-    return None
+            index[task.id] = TaskRef(section, section_index, stage, si, task, ti)
 
 
-def get_task_template_id(project: Project, task_instance_id: str) -> str | None:
+def index_project(project: Project) -> Project:
+    """(Re)build the task index and stage counters. Call after any structural change."""
+    index: dict[str, TaskRef] = {}
+    # Legacy stages first so that section tasks win on (unexpected) id clashes.
+    _index_stages(index, None, -1, project.stages)
+    for section_index, section in enumerate(project.sections):
+        _index_stages(index, section, section_index, section.stages)
+    project._task_index = index
+    context = FormContext()
+    for ref in index.values():
+        context.update(ref)
+    project._form_context = context
+    return project
+
+
+def find_task(project: Project, task_id: str) -> TaskRef | None:
+    return project._task_index.get(task_id)
+
+
+def find_stage(project: Project, stage_id: str) -> StageInstance | None:
     for section in project.sections:
         for stage in section.stages:
-            for task in stage.tasks:
-                if task.id == task_instance_id:
-                    return task.template_id
+            if stage.id == stage_id:
+                return stage
     for stage in project.stages:
-        for task in stage.tasks:
-            if task.id == task_instance_id:
-                return task.template_id
+        if stage.id == stage_id:
+            return stage
     return None
 
 
+# ---------------------------------------------------------------------------
+# Generation context
+# ---------------------------------------------------------------------------
+
+_MISSING = object()
+
+
+def _form_rank(ref: TaskRef) -> tuple[int, int, int, int]:
+    # Sections in order, then legacy project-level stages; within those by
+    # stage and task position. Higher rank wins a field.
+    if ref.section is None:
+        return (1, 0, ref.stage_index, ref.task_index)
+    return (0, ref.section_index, ref.stage_index, ref.task_index)
+
+
+class FormContext:
+    """Form data of all tasks of a project merged into one mapping.
+
+    When several tasks fill the same field, the one latest in the process
+    wins: sections in order, then legacy project-level stages, and within
+    those by stage, then task position (see ``_form_rank``). Updating a task
+    only touches that task's fields.
+    """
+
+    def __init__(self) -> None:
+        self.values: dict = {}
+        self._tasks: dict[tuple, dict] = {}  # rank -> copy of the task's form_data
+        self._sources: dict[str, dict[tuple, object]] = {}  # field -> rank -> value
+
+    def update(self, ref: TaskRef) -> None:
+        """Take over the current ``form_data`` of the referenced task."""
+        rank = _form_rank(ref)
+        old = self._tasks.get(rank, {})
+        new = dict(ref.task.form_data)
+        self._tasks[rank] = new
+        for key in old.keys() - new.keys():
+            sources = self._sources[key]
+            del sources[rank]
+            self._settle(key, sources)
+        for key, value in new.items():
+            if old.get(key, _MISSING) != value:
+                sources = self._sources.setdefault(key, {})
+                sources[rank] = value
+                self._settle(key, sources)
+
+    def _settle(self, key: str, sources: dict[tuple, object]) -> None:
+        if sources:
+            self.values[key] = sources[max(sources)]
+        else:
+            del self._sources[key]
+            self.values.pop(key, None)
+
+
+def form_context(project: Project) -> Mapping:
+    """Read-only merged form data of ``project`` (kept current by transitions)."""
+    return MappingProxyType(project._form_context.values)
+
+
+def find_task_in_project(project: Project, task_id: str) -> tuple[str, int, int] | None:
+    """Returns (section_id, stage_index, task_index) or None. Prefer ``find_task``."""
+    ref = find_task(project, task_id)
+    if ref is None:
+        return None
+    return (ref.section.id if ref.section else ""), ref.stage_index, ref.task_index
+
+
+def get_task_template_id(project: Project, task_instance_id: str) -> str | None:
+    ref = find_task(project, task_instance_id)
+    return ref.task.template_id if ref else None
+
+
+def summarize_project(project: Project) -> ProjectSummary:
+    """Build the portfolio summary from the stage counters, O(stages)."""
+    stages = [stage for section in project.sections for stage in section.stages]
+    stages.extend(project.stages)
+    tasks_total = sum(len(stage.tasks) for stage in stages)
+    tasks_done = sum(stage._done for stage in stages)
+    return ProjectSummary(
+        id=project.id,
+        name=project.name,
+        pfad=project.pfad,
+        kv_level=project.kv_level,
+        version=project.version,
+        current_stage_index=project.current_stage_index,
+        section_count=len(project.sections),
+        tasks_total=tasks_total,
+        tasks_done=tasks_done,
+        progress=round(tasks_done / tasks_total, 4) if tasks_total else 0.0,
+        blocker_count=len(project.blockers),
+        created_at=project.created_at,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Task transitions (event-sourced)
+# ---------------------------------------------------------------------------
+
+def make_task_event(
+    task: TaskInstance,
+    status: TaskStatus,
+    form_data: dict | None = None,
+    completed_checklist: list[int] | None = None,
+) -> TaskEvent:
+    """Describe a transition of ``task``; form_data is reduced to a delta."""
+    changed: dict = {}
+    removed: list[str] = []
+    if form_data is not None:
+        changed = {
+            k: v for k, v in form_data.items()
+            if k not in task.form_data or task.form_data[k] != v
+        }
+        removed = [k for k in task.form_data if k not in form_data]
+    return TaskEvent(
+        task_id=task.id,
+        status=status,
+        form_data=changed,
+        removed_fields=removed,
+        completed_checklist=completed_checklist,
+        updated_at=datetime.now(),
+    )
+
+
+def task_event_for(
+    task: TaskInstance,
+    action: str,
+    form_data: dict | None = None,
+    completed_checklist: list[int] | None = None,
+) -> TaskEvent:
+    """Build the event for a "save", "complete" or "reopen" request on ``task``."""
+    if action == "complete":
+        status = TaskStatus.DONE
+    elif action == "save":
+        status = TaskStatus.IN_PROGRESS if task.status == TaskStatus.PENDING else task.status
+    elif action == "reopen":
+        return make_task_event(task, TaskStatus.IN_PROGRESS)
+    else:
+        raise ValueError(f"Unknown task action: {action!r}")
+    return make_task_event(task, status, form_data, completed_checklist)
+
+
+def transition_task(project: Project, ref: TaskRef, event: TaskEvent) -> None:
+    """Apply ``event`` to the referenced task and re-evaluate its stage."""
+    previous = ref.task.status
+    apply_task_event(ref.task, event)
+    if event.form_data or event.removed_fields:
+        project._form_context.update(ref)
+    evaluate_task_change(project, ref, previous)
+
+
+def apply_task_event(task: TaskInstance, event: TaskEvent) -> None:
+    """Apply a recorded transition to a single task (no stage evaluation)."""
+    task.status = event.status
+    for key in event.removed_fields:
+        task.form_data.pop(key, None)
+    task.form_data.update(event.form_data)
+    if event.completed_checklist is not None:
+        task.completed_checklist = list(event.completed_checklist)
+    task.updated_at = event.updated_at
+
+
+def task_patch(
+    project: Project, ref: TaskRef, stage_status: StageStatus, current_stage_index: int
+) -> list[dict]:
+    """JSON Patch (RFC 6902) operations describing a transition of ``ref``.
+
+    ``stage_status`` and ``current_stage_index`` are the values captured
+    before the transition; the task itself is always replaced whole. The
+    caller appends the new ``/version`` once the change is committed.
+    """
+    stage_path = f"/stages/{ref.stage_index}"
+    if ref.section is not None:
+        stage_path = f"/sections/{ref.section_index}{stage_path}"
+    ops = [{
+        "op": "replace",
+        "path": f"{stage_path}/tasks/{ref.task_index}",
+        "value": ref.task.model_dump(mode="json"),
+    }]
+    if ref.stage.status != stage_status:
+        ops.append({"op": "replace", "path": f"{stage_path}/status", "value": ref.stage.status.value})
+    if project.current_stage_index != current_stage_index:
+        ops.append({"op": "replace", "path": "/current_stage_index", "value": project.current_stage_index})
+    return ops
+
+
 # ---------------------------------------------------------------------------
 # Demo project display translation (DE -> EN)
 # ---------------------------------------------------------------------------
@@ -880,48 +1207,63 @@ def _t(text: str) -> str:
     return _DEMO_TRANSLATIONS.get(text, text)
 
 
-def translate_project_display(project: Project, lang: str) -> Project:
-    """Return a copy of the project with display-facing demo fields translated.
-
-    If lang is "de", the project is returned unchanged (no copy).
-    For "en", a deep copy is made and known demo strings are translated.
-    """
-    if lang == "de":
-        return project
+# Translated views are cached per (project id, lang). An entry is only reused
+# for the very object and version it was built from, so any commit (or a
+# reload after a failed one) invalidates it.
+_VIEW_CACHE_SIZE = 256
+# (project id, lang) -> (version, view), for the project object itself
+_view_cache: IdentityCache[tuple[int, Project]] = IdentityCache(_VIEW_CACHE_SIZE)
 
-    p = project.model_copy(deep=True)
 
-    # Blockers
-    for blocker in p.blockers:
-        blocker.title = _t(blocker.title)
-        blocker.owner_role = _t(blocker.owner_role)
+_TRANSLATED_FIELDS = (
+    "blockers", "historical_cases", "documents", "project_tasks", "risks", "sections", "permits",
+)
 
-    # Historical cases
-    for case in p.historical_cases:
-        case.title = _t(case.title)
-        case.key_reasons = [_t(r) for r in case.key_reasons]
 
-    # Documents
-    for doc in p.documents:
-        doc.doc_type = _t(doc.doc_type)
+def _translated(items: list, *fields: str) -> list:
+    """Copy only the items whose ``fields`` actually have a translation."""
+    out = []
+    for item in items:
+        update = {}
+        for name in fields:
+            value = getattr(item, name)
+            new = [_t(v) for v in value] if isinstance(value, list) else _t(value)
+            if new != value:
+                update[name] = new
+        out.append(item.model_copy(update=update) if update else item)
+    return out
 
-    # Project tasks
-    for task in p.project_tasks:
-        task.title = _t(task.title)
-        task.owner_role = _t(task.owner_role)
-        task.done_definition = _t(task.done_definition)
 
-    # Risks
-    for risk in p.risks:
-        risk.mitigation = _t(risk.mitigation)
-        risk.owner = _t(risk.owner)
+def translate_project_display(project: Project, lang: str) -> Project:
+    """Return a read-only view of the project with demo fields translated.
 
-    # Sections
-    for section in p.sections:
-        section.name = _t(section.name)
+    If lang is "de", the project is returned unchanged (no copy).
+    Otherwise the view is a shallow copy: translated items are copied,
+    everything else (stages, tasks, geo data, ...) is shared with the
+    original. Views are cached until the project's version changes.
+    """
+    if lang == "de":
+        return project
 
-    # Permits
-    for permit in p.permits:
-        permit.label = _t(permit.label)
+    key = (project.id, lang)
+    cached = _view_cache.get(key, project)
+    if cached is not None and cached[0] == project.version:
+        return cached[1]
 
-    return p
+    if cached is not None:
+        # Same object, newer version: only task/stage state moved, and the
+        # translated lists share that state, so reuse them as they are.
+        translated = {name: getattr(cached[1], name) for name in _TRANSLATED_FIELDS}
+    else:
+        translated = {
+            "blockers": _translated(project.blockers, "title", "owner_role"),
+            "historical_cases": _translated(project.historical_cases, "title", "key_reasons"),
+            "documents": _translated(project.documents, "doc_type"),
+            "project_tasks": _translated(project.project_tasks, "title", "owner_role", "done_definition"),
+            "risks": _translated(project.risks, "mitigation", "owner"),
+            "sections": _translated(project.sections, "name"),
+            "permits": _translated(project.permits, "label"),
+        }
+    view = project.model_copy(update=translated)
+    _view_cache.put(key, project, (project.version, view))
+    return view
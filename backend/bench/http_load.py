@@ -0,0 +1,126 @@
+"""Closed-loop HTTP load generator (stdlib only).
+
+Opens N keep-alive connections and has each one send requests back to
+back for a fixed time, then reports throughput and latency per route::
+
+    python bench/http_load.py --connections 1000 --duration 20 \\
+        --get /api/project/P-DE-TSO-001/workflow?lang=de \\
+        --post /api/ai/generate-field '{"task_instance_id": "...", ...}' --post-share 0.1
+
+Only understands Content-Length framed responses, which is all the API
+sends outside of the SSE stream.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+
+class Route:
+    def __init__(self, method: str, path: str, body: bytes = b"") -> None:
+        self.label = f"{method} {path.split('?')[0]}"
+        head = f"{method} {path} HTTP/1.1\r\nHost: {{host}}\r\nConnection: keep-alive\r\n"
+        if body:
+            head += f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+        self.template = head + "\r\n"
+        self.body = body
+
+    def request(self, host: str) -> bytes:
+        return self.template.format(host=host).encode() + self.body
+
+
+async def _read_response(reader: asyncio.StreamReader) -> int:
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split()[1])
+    length = 0
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    if length:
+        await reader.readexactly(length)
+    return status
+
+
+async def _worker(host, port, route, deadline, stats, start_gate):
+    await start_gate.wait()
+    reader, writer = await asyncio.open_connection(host, port)
+    request = route.request(f"{host}:{port}")
+    latencies, statuses = stats[route.label]
+    try:
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            writer.write(request)
+            status = await _read_response(reader)
+            latencies.append(time.perf_counter() - t0)
+            statuses[status] += 1
+    except (ConnectionError, asyncio.IncompleteReadError):
+        statuses["conn_error"] += 1
+    finally:
+        writer.close()
+
+
+async def run(url: str, connections: int, duration: float, routes: list[tuple[Route, float]]) -> dict:
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    stats: dict[str, tuple[list[float], dict]] = defaultdict(lambda: ([], defaultdict(int)))
+    gate = asyncio.Event()
+    deadline = time.perf_counter() + duration + 1.0
+    tasks = []
+    assigned = 0
+    for i, (route, share) in enumerate(routes):
+        n = connections - assigned if i == len(routes) - 1 else round(connections * share)
+        assigned += n
+        tasks += [
+            asyncio.create_task(_worker(host, port, route, deadline, stats, gate)) for _ in range(n)
+        ]
+    await asyncio.sleep(1.0)  # let every connection get established first
+    gate.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    report = {}
+    for label, (latencies, statuses) in stats.items():
+        latencies.sort()
+        pick = lambda q: latencies[min(int(q * len(latencies)), len(latencies) - 1)] * 1000
+        report[label] = {
+            "requests": len(latencies),
+            "rps": round(len(latencies) / duration, 1),
+            "p50_ms": round(pick(0.50), 1) if latencies else None,
+            "p99_ms": round(pick(0.99), 1) if latencies else None,
+            "mean_ms": round(statistics.fmean(latencies) * 1000, 1) if latencies else None,
+            "status": dict(statuses),
+        }
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--get", action="append", default=[], help="GET path (repeatable)")
+    parser.add_argument("--post", nargs=2, metavar=("PATH", "JSON"), help="one POST route")
+    parser.add_argument("--post-share", type=float, default=0.1,
+                        help="share of connections sending --post")
+    args = parser.parse_args()
+
+    routes: list[tuple[Route, float]] = []
+    if args.post:
+        routes.append((Route("POST", args.post[0], args.post[1].encode()), args.post_share))
+    gets = args.get or ["/api/projects/summary"]
+    get_share = (1 - (args.post_share if args.post else 0)) / len(gets)
+    routes += [(Route("GET", path), get_share) for path in gets]
+
+    report = asyncio.run(run(args.url, args.connections, args.duration, routes))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
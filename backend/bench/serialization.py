@@ -0,0 +1,89 @@
+"""Per-response encoding cost of the read endpoints, before and after the fast path.
+
+    GRIDPERMIT_STORE=memory python bench/serialization.py
+
+"fastapi" is what a route with ``response_model`` does for a returned model:
+validate against the response field, turn it into plain objects, json.dumps.
+"dump_json" is ``model_dump_json`` on the whole response. "fast" is
+app.serialization with cached fragments, as the routes use it now.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_model_field  # noqa: E402
+
+from app import api, storage  # noqa: E402
+from app.mock_db import seed_demo_data  # noqa: E402
+from app.models import Project, TemplateRef, WorkflowResponse  # noqa: E402
+from app.serialization import projects_json  # noqa: E402
+from app.workflow_engine import get_compiled_template, translate_project_display  # noqa: E402
+
+WORKFLOW_FIELD = create_model_field("workflow", WorkflowResponse)
+PROJECTS_FIELD = create_model_field("projects", list[Project])
+loop = asyncio.new_event_loop()
+
+
+def fastapi_json(field, content) -> bytes:
+    plain = loop.run_until_complete(
+        serialize_response(field=field, response_content=content, is_coroutine=True)
+    )
+    return json.dumps(plain, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def workflow_model(project: Project, lang: str, include_template: bool) -> WorkflowResponse:
+    compiled = get_compiled_template(project.pfad, lang=lang)
+    return WorkflowResponse(
+        project=translate_project_display(project, lang),
+        template_ref=TemplateRef(pfad=project.pfad, lang=lang, etag=compiled.etag, url=""),
+        template=compiled.template if include_template else None,
+    )
+
+
+def per_call_us(fn, number: int) -> float:
+    fn()  # warm caches
+    return timeit.timeit(fn, number=number) / number * 1e6
+
+
+def main() -> None:
+    seed_demo_data()
+    project = storage.repository.get("P-DE-TSO-001")
+    for i in range(49):
+        copy = project.model_copy(deep=True, update={"id": f"bench-{i}"})
+        storage.repository.save(copy)
+    projects = storage.repository.list_all()
+
+    rows = []
+    for lang in ("de", "en"):
+        for include_template in (False, True):
+            model = workflow_model(project, lang, include_template)
+            rows.append((
+                f"workflow lang={lang} template={include_template}",
+                len(api._workflow_json(project, lang, include_template)),
+                per_call_us(lambda: fastapi_json(WORKFLOW_FIELD, model), 300),
+                per_call_us(lambda: model.model_dump_json().encode(), 300),
+                per_call_us(lambda: api._workflow_json(project, lang, include_template), 300),
+            ))
+    rows.append((
+        f"projects ({len(projects)})",
+        len(projects_json(projects)),
+        per_call_us(lambda: fastapi_json(PROJECTS_FIELD, projects), 20),
+        per_call_us(lambda: b"[" + b",".join(p.model_dump_json().encode() for p in projects) + b"]", 20),
+        per_call_us(lambda: projects_json(projects), 20),
+    ))
+
+    print(f"{'response':38} {'bytes':>8} {'fastapi':>10} {'dump_json':>10} {'fast':>10}  (us)")
+    for name, size, before, dump, fast in rows:
+        print(f"{name:38} {size:8d} {before:10.0f} {dump:10.0f} {fast:10.0f}  x{before / fast:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import os
+import sys
+import threading
+from pathlib import Path
+
+# The module-level repository must not touch the real data/ store.
+os.environ.setdefault("GRIDPERMIT_STORE", "memory")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pytest
+
+from app.models import Project, TaskEvent
+from app.workflow_engine import (
+    determine_pfad,
+    find_task,
+    get_compiled_template,
+    index_project,
+    task_event_for,
+    transition_task,
+)
+
+
+def new_project(name: str = "Test", kv_level: int = 380) -> Project:
+    pfad = determine_pfad(kv_level)
+    project = Project(
+        name=name,
+        pfad=pfad,
+        kv_level=kv_level,
+        stages=get_compiled_template(pfad).new_stages(),
+    )
+    return index_project(project)
+
+
+def first_task_id(project: Project) -> str:
+    return project.stages[0].tasks[0].id
+
+
+def save_task(project: Project, task_id: str, form_data: dict) -> TaskEvent:
+    """Apply a "save" of ``form_data`` to a task, as the API does before committing."""
+    ref = find_task(project, task_id)
+    event = task_event_for(ref.task, "save", form_data)
+    transition_task(project, ref, event)
+    return event
+
+
+@pytest.fixture
+def db_path(tmp_path: Path) -> Path:
+    return tmp_path / "gridpermit.db"
+
+
+@pytest.fixture
+def stub_server():
+    """A stub model server on a free port; set ``delay``/``fail_rate`` as needed."""
+    from app.stub_model_server import StubModelServer
+
+    server = StubModelServer(("127.0.0.1", 0))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def use_stub(stub_server):
+    """Route generation through ``stub_server``: ``use_stub(**service_options)``."""
+    from app import text_backend
+
+    url = f"http://127.0.0.1:{stub_server.server_address[1]}/generate"
+    yield lambda **options: text_backend.use_backend(text_backend.HTTPTextBackend(url), **options)
+    text_backend.use_backend(None)
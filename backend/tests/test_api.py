@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import api, storage
+from app.main import app
+
+from .conftest import save_task
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def create_project(client: TestClient) -> dict:
+    response = client.post("/api/project/create", json={"name": "API", "kv_level": 110})
+    assert response.status_code == 200
+    return response.json()["project"]
+
+
+@pytest.mark.parametrize("delta", [False, True])
+def test_task_writes_return_the_new_etag(client, delta):
+    project = create_project(client)
+    task_id = project["stages"][0]["tasks"][0]["id"]
+    params = {"project_id": project["id"], "delta": delta}
+    calls = [
+        ("post", f"/api/task/{task_id}/save", {"form_data": {"a": "b"}}),
+        ("post", f"/api/task/{task_id}/complete", {"form_data": {"a": "b"}}),
+        ("patch", f"/api/task/{task_id}/reopen", None),
+    ]
+    version = project["version"]
+    for method, url, body in calls:
+        response = client.request(
+            method, url, params=params, json=body, headers={"Accept-Encoding": "identity"}
+        )
+        assert response.status_code == 200
+        version += 1
+        assert response.headers["etag"] == f'"v{version}"'
+
+
+def test_delta_names_the_version_it_applies_to(client):
+    project = create_project(client)
+    task_id = project["stages"][0]["tasks"][0]["id"]
+    response = client.post(
+        f"/api/task/{task_id}/save",
+        params={"project_id": project["id"], "delta": True},
+        json={"form_data": {"a": "b"}},
+    )
+    body = response.json()
+    assert body["base_version"] == project["version"]
+    assert body["version"] == project["version"] + 1
+    assert body["patch"][-1] == {"op": "replace", "path": "/version", "value": body["version"]}
+
+
+def test_batch_is_all_or_nothing(client):
+    project = create_project(client)
+    tasks = project["stages"][0]["tasks"]
+    operations = [
+        {"task_id": tasks[0]["id"], "action": "complete"},
+        {"task_id": "no-such-task", "action": "save"},
+    ]
+    response = client.post(f"/api/project/{project['id']}/tasks/batch", json={"operations": operations})
+    assert response.status_code == 404
+
+    after = client.get(f"/api/project/{project['id']}/workflow").json()["project"]
+    assert after["version"] == project["version"]
+    assert after["stages"][0]["tasks"][0]["status"] == tasks[0]["status"]
+
+    response = client.post(
+        f"/api/project/{project['id']}/tasks/batch", json={"operations": operations[:1]}
+    )
+    assert response.status_code == 200
+    assert response.json()["version"] == project["version"] + 1
+    assert response.json()["tasks"] == {tasks[0]["id"]: "done"}
+
+
+def test_compressed_responses_have_their_own_etag(client):
+    project = create_project(client)
+    url = f"/api/project/{project['id']}/workflow"
+    plain = client.get(url, headers={"Accept-Encoding": "identity"})
+    packed = client.get(url, headers={"Accept-Encoding": "br"})
+    assert packed.headers["content-encoding"] == "br"
+    assert packed.headers["etag"] == plain.headers["etag"][:-1] + '-br"'
+
+    revalidated = client.get(url, headers={"Accept-Encoding": "br", "If-None-Match": packed.headers["etag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == packed.headers["etag"]
+
+    task_id = project["stages"][0]["tasks"][0]["id"]
+    saved = client.post(
+        f"/api/task/{task_id}/save",
+        params={"project_id": project["id"]},
+        headers={"If-Match": packed.headers["etag"]},
+        json={"form_data": {"a": "b"}},
+    )
+    assert saved.status_code == 200
+
+
+def test_workflow_etag_names_the_version_in_the_body(client):
+    project = create_project(client)
+    live = storage.repository.get(project["id"])
+    task_id = project["stages"][0]["tasks"][0]["id"]
+    locked = threading.Event()
+
+    def writer() -> None:
+        # Commit while the read is already past its version check.
+        with storage.repository.lock(live.id):
+            locked.set()
+            time.sleep(0.2)
+            storage.repository.commit(live, [save_task(live, task_id, {"a": "b"})])
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    locked.wait(5)
+    response = client.get(
+        f"/api/project/{project['id']}/workflow", headers={"Accept-Encoding": "identity"}
+    )
+    thread.join()
+
+    body = response.json()["project"]
+    assert body["version"] == project["version"] + 1
+    assert response.headers["etag"] == f'"v{body["version"]}"'
+    assert body["stages"][0]["tasks"][0]["form_data"] == {"a": "b"}
+
+
+def test_failed_batch_leaves_the_project_untouched(client, monkeypatch):
+    assert isinstance(storage.repository, storage.MemoryProjectRepository)
+    project = create_project(client)
+    tasks = [task for stage in project["stages"] for task in stage["tasks"]]
+    real_event_for = api.task_event_for
+    calls = []
+
+    def failing_event_for(task, action, *args):
+        calls.append(task.id)
+        if len(calls) == 3:
+            raise RuntimeError("boom")
+        return real_event_for(task, action, *args)
+
+    monkeypatch.setattr(api, "task_event_for", failing_event_for)
+    operations = [
+        {"task_id": tasks[0]["id"], "action": "complete", "form_data": {"a": "b"}},
+        {"task_id": tasks[1]["id"], "action": "save", "form_data": {"c": "d"}},
+        {"task_id": tasks[2]["id"], "action": "complete"},
+    ]
+    with TestClient(app, raise_server_exceptions=False) as failing:
+        response = failing.post(
+            f"/api/project/{project['id']}/tasks/batch", json={"operations": operations}
+        )
+    assert response.status_code == 500
+
+    after = client.get(f"/api/project/{project['id']}/workflow").json()["project"]
+    assert after["version"] == project["version"]
+    assert after["stages"] == project["stages"]
+    assert storage.repository.get(project["id"])._form_context.values == {}
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+import pytest
+
+from app.generators import _fallback_rule
+
+
+@pytest.mark.parametrize(
+    ("field_name", "field_label", "rule"),
+    [
+        ("anschreiben", "Text", "letter"),
+        ("x\nschreiben", "Text", "letter"),
+        ("notiz", "Empfänger", "recipient"),
+        ("notiz", "Zeile\nEmpfänger", "recipient"),
+        ("notiz", "Text", "draft"),
+    ],
+)
+def test_fallback_rule_ignores_newlines(field_name, field_label, rule):
+    assert _fallback_rule(field_name, field_label) == rule
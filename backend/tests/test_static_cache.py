@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from starlette.datastructures import Headers
+
+from app.compression import compress
+from app.static_cache import StaticCache
+
+
+def test_precompressed_variant_has_its_own_etag(tmp_path):
+    html = b"<html>" + b"x" * 2000 + b"</html>"
+    (tmp_path / "index.html").write_bytes(html)
+    (tmp_path / "index.html.br").write_bytes(compress(html, "br"))
+    cache = StaticCache.load(tmp_path)
+    entry = cache.lookup("index.html")
+
+    plain = cache.response(entry, Headers({"accept-encoding": "identity"}))
+    packed = cache.response(entry, Headers({"accept-encoding": "br"}))
+    assert plain.headers["etag"] == entry.etag
+    assert packed.headers["etag"] == entry.etag[:-1] + '-br"'
+    assert packed.headers["content-encoding"] == "br"
+
+    revalidated = cache.response(
+        entry, Headers({"accept-encoding": "br", "if-none-match": packed.headers["etag"]})
+    )
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == packed.headers["etag"]
+    assert "content-encoding" not in revalidated.headers
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from app.storage import SQLiteProjectRepository, StaleProjectError
+
+from .conftest import first_task_id, new_project, save_task
+
+
+def _task_ids(project, count: int) -> list[str]:
+    return [task.id for stage in project.stages for task in stage.tasks][:count]
+
+
+def test_load_replays_events_after_the_last_snapshot(db_path):
+    repo = SQLiteProjectRepository(db_path, snapshot_interval=3)
+    project = new_project()
+    repo.save(project)
+    task_ids = _task_ids(project, 7)
+    for i, task_id in enumerate(task_ids):
+        repo.commit(project, [save_task(project, task_id, {"step": str(i)})])
+
+    loaded = SQLiteProjectRepository(db_path).get(project.id)
+
+    assert loaded is not project
+    assert loaded.version == project.version
+    assert loaded.model_dump() == project.model_dump()
+
+
+def test_commit_on_a_stale_version_is_rejected(db_path):
+    first = SQLiteProjectRepository(db_path)
+    second = SQLiteProjectRepository(db_path)
+    project = new_project()
+    first.save(project)
+    task_id = first_task_id(project)
+
+    theirs = second.get(project.id)
+    second.commit(theirs, [save_task(theirs, task_id, {"by": "second"})])
+    # ``first`` has not synced yet and still holds the old version.
+    with pytest.raises(StaleProjectError):
+        first.commit(project, [save_task(project, task_id, {"by": "first"})])
+
+    current = first.get(project.id)
+    assert current is not project  # the dirty copy was evicted
+    assert current.version == theirs.version
+    assert current.stages[0].tasks[0].form_data == {"by": "second"}
+
+
+def test_sync_catches_up_cached_projects_from_another_repository(db_path):
+    worker = SQLiteProjectRepository(db_path)
+    other = SQLiteProjectRepository(db_path)
+    project = new_project()
+    worker.save(project)
+    changes = []
+    worker.add_listener(changes.append)
+
+    theirs = other.get(project.id)
+    events = [save_task(theirs, task_id, {"n": "1"}) for task_id in _task_ids(theirs, 2)]
+    other.commit(theirs, events)
+
+    current = worker.get(project.id)
+    assert current is project  # replayed in place, not reloaded
+    assert current.version == theirs.version
+    assert current.model_dump() == theirs.model_dump()
+    assert [(c.version, len(c.tasks)) for c in changes] == [(theirs.version, 2)]
+
+
+def test_sync_does_not_wait_for_locks_held_by_other_threads(db_path):
+    worker = SQLiteProjectRepository(db_path)
+    other = SQLiteProjectRepository(db_path)  # a second process on the same file
+    p1, p2 = new_project("P1"), new_project("P2")
+    worker.save(p1)
+    worker.save(p2)
+    saved = {p1.id: p1.version, p2.id: p2.version}
+
+    held = {p1.id: threading.Event(), p2.id: threading.Event()}
+    go = {p1.id: threading.Event(), p2.id: threading.Event()}
+    done = {p1.id: threading.Event(), p2.id: threading.Event()}
+
+    def writer(project_id: str) -> None:
+        # Like ``_project_for_update``: hold the project lock, then read.
+        with worker.lock(project_id):
+            held[project_id].set()
+            go[project_id].wait(5)
+            worker.get(project_id)
+        done[project_id].set()
+
+    threads = [threading.Thread(target=writer, args=(pid,), daemon=True) for pid in held]
+    for thread in threads:
+        thread.start()
+    for event in held.values():
+        assert event.wait(5)
+
+    # Each thread's sync sees a foreign commit on the project the other holds.
+    for project_id, reader in ((p2.id, p1.id), (p1.id, p2.id)):
+        project = other.get(project_id)
+        event = save_task(project, first_task_id(project), {"note": project_id})
+        other.commit(project, [event])
+        go[reader].set()
+        assert done[reader].wait(5), "sync blocked on another project's lock"
+
+    for project_id, version in saved.items():
+        current = worker.get(project_id)
+        assert current.version == version + 1
+        assert current.stages[0].tasks[0].form_data == {"note": project_id}
+
+
+def test_readers_wait_for_feed_events_being_applied(db_path):
+    worker = SQLiteProjectRepository(db_path)
+    other = SQLiteProjectRepository(db_path)
+    project = new_project()
+    worker.save(project)
+    saved = project.version
+
+    theirs = other.get(project.id)
+    other.commit(theirs, [save_task(theirs, first_task_id(theirs), {"n": "1"})])
+
+    applying, release = threading.Event(), threading.Event()
+    catch_up = worker._catch_up
+
+    def slow_catch_up(cached, events):
+        applying.set()
+        release.wait(5)
+        return catch_up(cached, events)
+
+    worker._catch_up = slow_catch_up
+    seen = {}
+
+    def read(name: str) -> None:
+        seen[name] = worker.get(project.id).version
+
+    syncing = threading.Thread(target=read, args=("syncing",))
+    syncing.start()
+    assert applying.wait(5)
+    # This reader's sync finds nothing new past the cursor; it must still
+    # not get the cached project before the events are on it.
+    reader = threading.Thread(target=read, args=("reader",))
+    reader.start()
+    reader.join(0.2)
+    release.set()
+    syncing.join(5)
+    reader.join(5)
+
+    assert seen == {"syncing": saved + 1, "reader": saved + 1}
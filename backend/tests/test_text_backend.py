@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from app import generators, text_backend
+
+from .conftest import new_project
+
+
+async def _stream(project, field_name: str) -> tuple[list[str], float]:
+    """The chunks of a streamed field text and the delay of the first one."""
+    start = time.perf_counter()
+    first = None
+    chunks = []
+    async for chunk in generators.stream_field_text(project, "t", field_name, "Bericht", "de"):
+        first = first if first is not None else time.perf_counter() - start
+        chunks.append(chunk)
+    return chunks, first
+
+
+def test_text_backend_is_abstract():
+    with pytest.raises(TypeError):
+        text_backend.TextBackend()
+
+
+def test_model_text_streams_before_it_is_complete(stub_server, use_stub):
+    stub_server.delay = 1.0
+    use_stub(timeout=5)
+    project = new_project("Süd")
+
+    chunks, first = asyncio.run(_stream(project, "bericht"))
+
+    assert "".join(chunks) == '[Modell] Bericht für das Vorhaben "Süd".'
+    assert len(chunks) > 1
+    assert first < stub_server.delay / 2
+    assert stub_server.streams == 1
+
+
+def test_failed_stream_falls_back(stub_server, use_stub):
+    stub_server.fail_rate = 1.0
+    service = use_stub(timeout=5)
+    project = new_project()
+
+    chunks, _ = asyncio.run(_stream(project, "bericht"))
+
+    assert "".join(chunks) == generators.fallback_text(project, "bericht", "Bericht", "de")
+    assert service.failures == 1
+
+
+def test_slow_backend_falls_back_to_the_generic_text(stub_server, use_stub):
+    stub_server.delay = 1.0
+    service = use_stub(timeout=0.2)
+    project = new_project()
+
+    text = asyncio.run(generators.generate_text(project, "t", "bericht", "Bericht", "de"))
+
+    assert text == generators.fallback_text(project, "bericht", "Bericht", "de")
+    assert service.timeouts == 1
+
+
+def test_requests_arriving_together_share_one_backend_call(stub_server, use_stub):
+    use_stub(batch_window=0.05)
+    project = new_project("Nord")
+
+    async def generate_all() -> list[str]:
+        return await asyncio.gather(*(
+            generators.generate_text(project, "t", f"feld{i}", f"Feld {i}", "de")
+            for i in range(3)
+        ))
+
+    texts = asyncio.run(generate_all())
+
+    assert texts == [f'[Modell] Feld {i} für das Vorhaben "Nord".' for i in range(3)]
+    assert stub_server.batch_sizes == [3]
+
+
+def test_dropped_connection_falls_back(stub_server, use_stub):
+    stub_server.drop_rate = 1.0
+    service = use_stub(timeout=5)
+    project = new_project()
+    fallback = generators.fallback_text(project, "bericht", "Bericht", "de")
+
+    chunks, _ = asyncio.run(_stream(project, "bericht"))
+    text = asyncio.run(generators.generate_text(project, "t", "bericht", "Bericht", "de"))
+
+    assert "".join(chunks) == fallback
+    assert text == fallback
+    assert service.failures == 2
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import random
+
+from app.models import Project, Section, StageStatus
+from app.workflow_engine import (
+    determine_pfad,
+    evaluate_stage,
+    find_task,
+    get_compiled_template,
+    get_template,
+    index_project,
+    task_event_for,
+    transition_task,
+)
+
+from .conftest import new_project
+
+
+def _apply(project: Project, task_id: str, action: str) -> None:
+    ref = find_task(project, task_id)
+    transition_task(project, ref, task_event_for(ref.task, action))
+
+
+def test_stage_cursor_follows_the_first_unfinished_legacy_stage():
+    project = new_project()
+    first, second = project.stages[0], project.stages[1]
+
+    for task in first.tasks:
+        _apply(project, task.id, "complete")
+    assert first.status == StageStatus.COMPLETED
+    assert project.current_stage_index == 1
+
+    _apply(project, first.tasks[0].id, "reopen")
+    assert project.current_stage_index == 0
+    assert second.status == StageStatus.PENDING
+
+
+def test_incremental_evaluation_matches_a_full_recount():
+    project = new_project()
+    task_ids = [task.id for stage in project.stages for task in stage.tasks]
+    template = get_template(project.pfad)
+    rng = random.Random(4)
+    for _ in range(500):
+        _apply(project, rng.choice(task_ids), rng.choice(("save", "complete", "complete", "reopen")))
+        incremental = project.current_stage_index, [stage.status for stage in project.stages]
+        evaluate_stage(project, template)
+        assert (project.current_stage_index, [stage.status for stage in project.stages]) == incremental
+
+
+def test_stage_cursor_of_a_project_without_legacy_stages_stays_put():
+    # The full recount used to set it to len(stages) - 1 == -1 on the first
+    # mutation; task changes in sections no longer touch it.
+    pfad = determine_pfad(380)
+    section = Section(
+        id="sec", name="Nord", km_start=0, km_end=10, region="Bayern",
+        stages=get_compiled_template(pfad).new_stages(),
+    )
+    project = index_project(Project(name="Sections", pfad=pfad, kv_level=380, sections=[section]))
+
+    for task in section.stages[0].tasks:
+        _apply(project, task.id, "complete")
+
+    assert section.stages[0].status == StageStatus.COMPLETED
+    assert project.current_stage_index == 0
+
+
+def test_compiled_template_matches_its_template():
+    pfad = determine_pfad(380)
+    compiled = get_compiled_template(pfad)
+    stages = compiled.new_stages()
+
+    assert [stage.template_id for stage in stages] == [s.id for s in compiled.template.stages]
+    for stage, stage_tpl in zip(stages, compiled.template.stages):
+        assert [task.template_id for task in stage.tasks] == [t.id for t in stage_tpl.tasks]
+        for task_tpl in stage_tpl.tasks:
+            assert compiled.form_fields[task_tpl.id] == tuple(task_tpl.form_fields)
+    assert compiled.new_stages()[0].id != stages[0].id  # fresh instances every time
@@ -1,8 +1,10 @@
-import { useQuery } from "@tanstack/react-query";
-import { fetchWorkflow } from "./api/client";
+import { useQuery, useQueryClient } from "@tanstack/react-query";
+import { useEffect } from "react";
+import { fetchWorkflow, subscribeProjectEvents } from "./api/client";
 import Layout from "./components/Layout";
 import { useT } from "./i18n/translations";
 import { useWorkflowStore } from "./store/workflowStore";
+import type { WorkflowResponse } from "./types";
 
 export default function App() {
   const projectId = useWorkflowStore((s) => s.projectId);
@@ -15,6 +17,21 @@ export default function App() {
     enabled: !!projectId,
   });
 
+  // Refetch when a colleague commits; our own commits are already patched in.
+  const queryClient = useQueryClient();
+  useEffect(() => {
+    if (!projectId) return;
+    const refetch = () => queryClient.invalidateQueries({ queryKey: ["workflow", projectId] });
+    return subscribeProjectEvents(
+      projectId,
+      (change) => {
+        const cached = queryClient.getQueryData<WorkflowResponse>(["workflow", projectId, language]);
+        if (!cached || cached.project.version < change.version) refetch();
+      },
+      refetch
+    );
+  }, [projectId, language, queryClient]);
+
   if (!projectId) {
     return (
       <div className="flex h-screen items-center justify-center">
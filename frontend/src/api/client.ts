@@ -1,5 +1,20 @@
 import type { Language } from "../i18n/translations";
-import type { AIFieldResponse, Project, WorkflowResponse } from "../types";
+import type {
+  AIFieldResponse,
+  AIStageResponse,
+  AITaskResponse,
+  ProcessTemplate,
+  Project,
+  ProjectChange,
+  ProjectSummary,
+  ProjectSummaryPage,
+  TaskBatchResponse,
+  TaskOperation,
+  TaskPatchResponse,
+  TemplateRef,
+  WorkflowPayload,
+  WorkflowResponse,
+} from "../types";
 
 const BASE = "/api";
 
@@ -15,14 +30,57 @@ async function request<T>(url: string, options?: RequestInit): Promise<T> {
   return res.json();
 }
 
-export function fetchWorkflow(projectId: string, lang: Language = "de") {
-  return request<WorkflowResponse>(`/project/${projectId}/workflow?lang=${lang}`);
+// Templates are immutable per content hash, so one fetch per ref is enough.
+const templates = new Map<string, Promise<ProcessTemplate>>();
+
+export function fetchTemplate(ref: TemplateRef) {
+  let template = templates.get(ref.url);
+  if (!template) {
+    template = request<ProcessTemplate>(ref.url.replace(/^\/api/, ""));
+    template.catch(() => templates.delete(ref.url));
+    templates.set(ref.url, template);
+  }
+  return template;
+}
+
+export async function fetchWorkflow(
+  projectId: string,
+  lang: Language = "de"
+): Promise<WorkflowResponse> {
+  const data = await request<WorkflowPayload>(`/project/${projectId}/workflow?lang=${lang}`);
+  return { ...data, template: data.template ?? (await fetchTemplate(data.template_ref)) };
+}
+
+/**
+ * Follow a project's change stream. `onResync` fires when changes were
+ * missed and the workflow has to be refetched. Returns an unsubscribe.
+ */
+export function subscribeProjectEvents(
+  projectId: string,
+  onChange: (change: ProjectChange) => void,
+  onResync: () => void
+) {
+  const source = new EventSource(`${BASE}/project/${projectId}/events`);
+  source.addEventListener("change", (e) => onChange(JSON.parse((e as MessageEvent).data)));
+  source.addEventListener("resync", onResync);
+  return () => source.close();
 }
 
 export function fetchProjects() {
   return request<Project[]>("/projects");
 }
 
+export function fetchProjectSummaries<K extends keyof ProjectSummary>(
+  options: { cursor?: string | null; limit?: number; fields?: K[] } = {},
+) {
+  const params = new URLSearchParams();
+  if (options.cursor) params.set("cursor", options.cursor);
+  if (options.limit) params.set("limit", String(options.limit));
+  if (options.fields?.length) params.set("fields", options.fields.join(","));
+  const query = params.toString();
+  return request<ProjectSummaryPage<K>>(`/projects/summary${query ? `?${query}` : ""}`);
+}
+
 export function completeTask(
   taskId: string,
   projectId: string,
@@ -31,9 +89,9 @@ export function completeTask(
   lang: Language = "de",
   sectionId?: string
 ) {
-  let url = `/task/${taskId}/complete?project_id=${projectId}&lang=${lang}`;
+  let url = `/task/${taskId}/complete?project_id=${projectId}&lang=${lang}&delta=true`;
   if (sectionId) url += `&section_id=${sectionId}`;
-  return request<{ status: string; project: Project }>(url, {
+  return request<TaskPatchResponse>(url, {
     method: "POST",
     body: JSON.stringify({
       form_data: formData,
@@ -50,9 +108,9 @@ export function saveTask(
   lang: Language = "de",
   sectionId?: string
 ) {
-  let url = `/task/${taskId}/save?project_id=${projectId}&lang=${lang}`;
+  let url = `/task/${taskId}/save?project_id=${projectId}&lang=${lang}&delta=true`;
   if (sectionId) url += `&section_id=${sectionId}`;
-  return request<{ status: string }>(url, {
+  return request<TaskPatchResponse>(url, {
     method: "POST",
     body: JSON.stringify({
       form_data: formData,
@@ -61,6 +119,13 @@ export function saveTask(
   });
 }
 
+export function batchTasks(projectId: string, operations: TaskOperation[], lang: Language = "de") {
+  return request<TaskBatchResponse>(`/project/${projectId}/tasks/batch?lang=${lang}`, {
+    method: "POST",
+    body: JSON.stringify({ operations }),
+  });
+}
+
 export function executeEmailAction(emailId: string, actionType: string) {
   return request<{ status: string }>(`/email/${emailId}/action?action_type=${actionType}`, {
     method: "POST",
@@ -68,7 +133,7 @@ export function executeEmailAction(emailId: string, actionType: string) {
 }
 
 export function reopenTask(taskId: string, projectId: string, lang: Language = "de") {
-  return request<{ status: string }>(`/task/${taskId}/reopen?project_id=${projectId}&lang=${lang}`, {
+  return request<TaskPatchResponse>(`/task/${taskId}/reopen?project_id=${projectId}&lang=${lang}&delta=true`, {
     method: "PATCH",
   });
 }
@@ -91,3 +156,82 @@ export function generateFieldText(
     }),
   });
 }
+
+/**
+ * Like `generateFieldText`, but streamed: `onText` gets the text received
+ * so far after every chunk. Resolves with the complete text.
+ */
+export async function streamFieldText(
+  taskInstanceId: string,
+  projectId: string,
+  fieldName: string,
+  fieldLabel: string,
+  lang: Language,
+  onText: (text: string) => void
+): Promise<string> {
+  const res = await fetch(`${BASE}/ai/generate-field/stream`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({
+      task_instance_id: taskInstanceId,
+      project_id: projectId,
+      field_name: fieldName,
+      field_label: fieldLabel,
+      lang,
+    }),
+  });
+  if (!res.ok || !res.body) {
+    const body = await res.json().catch(() => ({}));
+    throw new Error(body.detail ?? `Request failed: ${res.status}`);
+  }
+  const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = "";
+  let text = "";
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) return text;
+    buffer += value;
+    let end: number;
+    while ((end = buffer.indexOf("\n\n")) >= 0) {
+      const message = buffer.slice(0, end);
+      buffer = buffer.slice(end + 2);
+      const event = /^event: (.*)$/m.exec(message)?.[1];
+      const data = /^data: (.*)$/m.exec(message)?.[1];
+      if (data === undefined) continue;
+      const payload = JSON.parse(data);
+      if (event === "delta") {
+        text += payload.text;
+        onText(text);
+      } else if (event === "done") {
+        reader.cancel();
+        return payload.text;
+      } else if (event === "error") {
+        throw new Error(payload.detail);
+      }
+    }
+  }
+}
+
+/** All text fields of a task in one request (field name -> text). */
+export function generateTaskTexts(
+  taskInstanceId: string,
+  projectId: string,
+  lang: Language = "de"
+) {
+  return request<AITaskResponse>("/ai/generate-task", {
+    method: "POST",
+    body: JSON.stringify({ task_instance_id: taskInstanceId, project_id: projectId, lang }),
+  });
+}
+
+/** All text fields of every task in a stage (task id -> field name -> text). */
+export function generateStageTexts(
+  stageInstanceId: string,
+  projectId: string,
+  lang: Language = "de"
+) {
+  return request<AIStageResponse>("/ai/generate-stage", {
+    method: "POST",
+    body: JSON.stringify({ stage_instance_id: stageInstanceId, project_id: projectId, lang }),
+  });
+}
@@ -0,0 +1,40 @@
+import type { JsonPatchOp } from "../types";
+
+type Container = Record<string, unknown> | unknown[];
+
+function decode(segment: string) {
+  return segment.replace(/~1/g, "/").replace(/~0/g, "~");
+}
+
+function setIn(node: unknown, keys: string[], op: JsonPatchOp): unknown {
+  const [key, ...rest] = keys;
+  if (key === undefined) return op.value;
+  const copy: Container = Array.isArray(node) ? [...node] : { ...(node as Record<string, unknown>) };
+
+  if (Array.isArray(copy)) {
+    const index = key === "-" ? copy.length : Number(key);
+    if (rest.length > 0) copy[index] = setIn(copy[index], rest, op);
+    else if (op.op === "add") copy.splice(index, 0, op.value);
+    else if (op.op === "remove") copy.splice(index, 1);
+    else copy[index] = op.value;
+  } else if (rest.length > 0) {
+    copy[key] = setIn(copy[key], rest, op);
+  } else if (op.op === "remove") {
+    delete copy[key];
+  } else {
+    copy[key] = op.value;
+  }
+  return copy;
+}
+
+/**
+ * Apply JSON Patch add/replace/remove operations without mutating `doc`.
+ * Only the containers along each path are copied, so untouched parts of
+ * the document keep their identity (and React skips re-rendering them).
+ */
+export function applyPatch<T>(doc: T, ops: JsonPatchOp[]): T {
+  return ops.reduce<unknown>(
+    (node, op) => setIn(node, op.path.split("/").slice(1).map(decode), op),
+    doc
+  ) as T;
+}
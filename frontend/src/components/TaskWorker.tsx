@@ -14,7 +14,14 @@ import {
   Upload,
 } from "lucide-react";
 import { useState } from "react";
-import { completeTask, generateFieldText, reopenTask, saveTask } from "../api/client";
+import {
+  completeTask,
+  generateTaskTexts,
+  reopenTask,
+  saveTask,
+  streamFieldText,
+} from "../api/client";
+import { applyPatch } from "../api/patch";
 import { useT } from "../i18n/translations";
 import { useWorkflowStore } from "../store/workflowStore";
 import type {
@@ -22,7 +29,9 @@ import type {
   ProcessTemplate,
   Project,
   TaskInstance,
+  TaskPatchResponse,
   TaskTemplate,
+  WorkflowResponse,
 } from "../types";
 import DocumentUpload from "./DocumentUpload";
 import MapPanel from "./MapPanel";
@@ -40,6 +49,9 @@ interface Props {
 // Tasks that benefit from the map view
 const MAP_TASKS = new Set(["s2_t1", "s2_t2", "s2_t3", "s3_t1", "s1_t3"]);
 
+// loadingField marker while all fields are being generated at once
+const FILL_ALL = "*";
+
 export default function TaskWorker({
   project,
   template,
@@ -80,14 +92,35 @@ export default function TaskWorker({
   const handleAIGenerate = async (field: FormField) => {
     setLoadingField(field.name);
     try {
-      const res = await generateFieldText(
+      const text = await streamFieldText(
         taskInstance.id,
         project.id,
         field.name,
         field.label,
-        language
+        language,
+        (partial) => updateField(field.name, partial)
       );
-      updateField(field.name, res.text);
+      updateField(field.name, text);
+    } catch {
+      // silently fail for MVP
+    } finally {
+      setLoadingField(null);
+    }
+  };
+
+  // One request for the whole task; only fields the user has not filled yet
+  // are taken over.
+  const handleAIFillEmpty = async () => {
+    setLoadingField(FILL_ALL);
+    try {
+      const res = await generateTaskTexts(taskInstance.id, project.id, language);
+      setFormData((prev) => {
+        const next = { ...prev };
+        for (const [name, text] of Object.entries(res.fields)) {
+          if ((next[name] ?? "").trim() === "") next[name] = text;
+        }
+        return next;
+      });
     } catch {
       // silently fail for MVP
     } finally {
@@ -95,26 +128,46 @@ export default function TaskWorker({
     }
   };
 
+  // Task and stage state is language-independent, so the server's patch
+  // applies to the cached workflow of every language — but only to a copy
+  // at the version it was computed against. Anything else is refetched.
+  const applyTaskPatch = (res: TaskPatchResponse) => {
+    let stale = false;
+    queryClient.setQueriesData<WorkflowResponse>(
+      { queryKey: ["workflow", project.id] },
+      (data) => {
+        if (!data) return data;
+        if (data.project.version !== res.base_version) {
+          stale = true;
+          return data;
+        }
+        return { ...data, project: applyPatch(data.project, res.patch) };
+      }
+    );
+    if (stale) {
+      queryClient.invalidateQueries({ queryKey: ["workflow", project.id] });
+    }
+  };
+
   const saveMutation = useMutation({
     mutationFn: () =>
       saveTask(taskInstance.id, project.id, formData, checklist, language, sectionId),
-    onSuccess: () =>
-      queryClient.invalidateQueries({ queryKey: ["workflow", project.id] }),
+    onSuccess: applyTaskPatch,
   });
 
   const completeMutation = useMutation({
     mutationFn: () =>
       completeTask(taskInstance.id, project.id, formData, checklist, language, sectionId),
-    onSuccess: () => {
-      queryClient.invalidateQueries({ queryKey: ["workflow", project.id] });
+    onSuccess: (res) => {
+      applyTaskPatch(res);
       setIsDone(true);
     },
   });
 
   const reopenMutation = useMutation({
     mutationFn: () => reopenTask(taskInstance.id, project.id, language),
-    onSuccess: () => {
-      queryClient.invalidateQueries({ queryKey: ["workflow", project.id] });
+    onSuccess: (res) => {
+      applyTaskPatch(res);
       setIsDone(false);
     },
   });
@@ -283,8 +336,25 @@ export default function TaskWorker({
           {/* Form fields */}
           {taskTemplate.form_fields.length > 0 && (
             <div className="space-y-4">
+              {!isDone && taskTemplate.form_fields.some((f) => f.type !== "date") && (
+                <div className="flex justify-end">
+                  <button
+                    onClick={handleAIFillEmpty}
+                    disabled={loadingField !== null}
+                    className="flex items-center gap-1 rounded-md bg-violet-50 px-2.5 py-1 text-xs font-medium text-violet-700 transition hover:bg-violet-100 disabled:opacity-40"
+                  >
+                    {loadingField === FILL_ALL ? (
+                      <Loader2 className="h-3.5 w-3.5 animate-spin" />
+                    ) : (
+                      <Sparkles className="h-3.5 w-3.5" />
+                    )}
+                    {t("task.aiFillEmpty")}
+                  </button>
+                </div>
+              )}
               {taskTemplate.form_fields.map((field) => {
-                const isFieldLoading = loadingField === field.name;
+                const isFieldLoading =
+                  loadingField === field.name || loadingField === FILL_ALL;
                 const showAI = field.type !== "date";
                 const fieldValue = formData[field.name] ?? "";
 
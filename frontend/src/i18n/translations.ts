@@ -83,6 +83,7 @@ const de: Record<string, string> = {
   "task.previousContext": "Kontext aus vorherigen Phasen",
   "task.clearField": "Feld leeren",
   "task.ai": "KI",
+  "task.aiFillEmpty": "Leere Felder mit KI füllen",
   "task.checklist": "Checkliste",
   "task.documents": "Dokumente",
   "task.attachDocument": "Dokument anhängen",
@@ -285,6 +286,7 @@ const en: Record<string, string> = {
   "task.previousContext": "Context from Previous Phases",
   "task.clearField": "Clear field",
   "task.ai": "AI",
+  "task.aiFillEmpty": "Fill empty fields with AI",
   "task.checklist": "Checklist",
   "task.documents": "Documents",
   "task.attachDocument": "Attach document",
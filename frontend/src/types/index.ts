@@ -138,6 +138,7 @@ export interface Project {
   length_km: number;
   is_multi_state: boolean;
   current_stage_index: number;
+  version: number;
   stages: StageInstance[];
   blockers: Blocker[];
   geo_layers: GeoLayer[];
@@ -150,11 +151,102 @@ export interface Project {
   created_at: string;
 }
 
-export interface WorkflowResponse {
+export interface TemplateRef {
+  pfad: VerfahrensPfad;
+  lang: string;
+  etag: string;
+  url: string;
+}
+
+/** Workflow as sent by the server; the template is fetched separately. */
+export interface WorkflowPayload {
   project: Project;
+  template_ref: TemplateRef;
+  template?: ProcessTemplate | null;
+}
+
+export interface WorkflowResponse extends WorkflowPayload {
   template: ProcessTemplate;
 }
 
+export type TaskAction = "save" | "complete" | "reopen";
+
+export interface TaskOperation {
+  task_id: string;
+  action: TaskAction;
+  form_data?: Record<string, string>;
+  completed_checklist?: number[];
+}
+
+export interface JsonPatchOp {
+  op: "add" | "replace" | "remove";
+  path: string;
+  value?: unknown;
+}
+
+export interface TaskPatchResponse {
+  status: string;
+  version: number;
+  base_version: number;
+  patch: JsonPatchOp[];
+}
+
+export interface TaskEvent {
+  task_id: string;
+  status: TaskStatus;
+  form_data: Record<string, string>;
+  removed_fields: string[];
+  completed_checklist: number[] | null;
+  updated_at: string;
+  version: number;
+}
+
+/** Pushed by GET /project/{id}/events after every commit. */
+export interface ProjectChange {
+  project_id: string;
+  version: number;
+  tasks: TaskEvent[];
+  stages: Record<string, StageStatus>;
+  current_stage_index: number | null;
+}
+
+export interface TaskBatchResponse {
+  status: string;
+  applied: number;
+  current_stage_index: number;
+  version: number;
+  tasks: Record<string, TaskStatus>;
+  stages: Record<string, StageStatus>;
+}
+
+export interface ProjectSummary {
+  id: string;
+  name: string;
+  pfad: VerfahrensPfad;
+  kv_level: number;
+  version: number;
+  current_stage_index: number;
+  section_count: number;
+  tasks_total: number;
+  tasks_done: number;
+  progress: number;
+  blocker_count: number;
+  created_at: string;
+}
+
+export interface ProjectSummaryPage<K extends keyof ProjectSummary = keyof ProjectSummary> {
+  items: Pick<ProjectSummary, K | "id">[];
+  next_cursor: string | null;
+}
+
 export interface AIFieldResponse {
   text: string;
 }
+
+export interface AITaskResponse {
+  fields: Record<string, string>;
+}
+
+export interface AIStageResponse {
+  tasks: Record<string, Record<string, string>>;
+}